@@ -0,0 +1,95 @@
+"""
+Benchmarks the serve-mode Dispatcher under a mixed command load.
+
+Upstream calls are simulated with sleeps (no Groww credentials needed), so the
+numbers isolate queueing behaviour: a burst of slow `historical_daily` requests
+interleaved with many fast `smart_ltp` refreshes.
+
+Usage: python benchmark_cli_dispatch.py [--requests 400] [--workers 8] [--rate 20]
+"""
+import argparse
+import random
+import threading
+import time
+
+from quantedge_groww.cli import Dispatcher
+
+SIMULATED_LATENCY_S = {
+    "historical_daily": (0.8, 1.5),
+    "smart_ltp": (0.03, 0.08),
+    "quote": (0.02, 0.05),
+}
+MIX = ["smart_ltp"] * 14 + ["quote"] * 4 + ["historical_daily"] * 2
+
+
+def simulated_handler(request):
+    lo, hi = SIMULATED_LATENCY_S[request["command"]]
+    time.sleep(random.uniform(lo, hi))
+    return {"ok": True, "requestId": request["requestId"], "operation": request["command"]}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def run(requests, workers, command_limits=None, rate=None):
+    """Replays requests with Poisson arrivals at `rate` req/s (all at once if None)."""
+    latencies = {}
+    lock = threading.Lock()
+    dispatcher = Dispatcher(max_workers=workers, command_limits=command_limits, handler=simulated_handler)
+    started = {}
+
+    def make_reply(req):
+        def reply(_response):
+            elapsed = time.perf_counter() - started[req["requestId"]]
+            with lock:
+                latencies.setdefault(req["command"], []).append(elapsed)
+        return reply
+
+    t0 = time.perf_counter()
+    futures = []
+    for req in requests:
+        if rate:
+            time.sleep(random.expovariate(rate))
+        started[req["requestId"]] = time.perf_counter()
+        futures.append(dispatcher.submit(req, make_reply(req)))
+    for f in futures:
+        f.result()
+    total = time.perf_counter() - t0
+    dispatcher.shutdown()
+    return latencies, total
+
+
+def report(label, latencies, total):
+    print(f"\n{label}: total {total:.2f}s")
+    for command in sorted(latencies):
+        vals = latencies[command]
+        print(f"  {command:18} n={len(vals):4}  p50={percentile(vals, 50) * 1000:8.1f}ms  "
+              f"p99={percentile(vals, 99) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20.0, help="arrivals per second (0 = burst)")
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(7)
+    requests = [
+        {"command": random.choice(MIX), "requestId": f"bench-{i}", "payload": {}}
+        for i in range(args.requests)
+    ]
+
+    rate = args.rate or None
+
+    if not args.skip_serial:
+        # Equivalent to the old one-request-at-a-time loop
+        report("Serial (1 worker)", *run(requests, 1, command_limits={}, rate=rate))
+    report(f"Dispatcher ({args.workers} workers, per-command limits)",
+           *run(requests, args.workers, rate=rate))
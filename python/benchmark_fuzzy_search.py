@@ -0,0 +1,145 @@
+"""
+Benchmarks fuzzy instrument search: trigram-index candidates vs. the previous
+full-DataFrame regex scan.
+
+A synthetic instrument master (no Groww credentials needed) is stored in a temp
+cache dir; each query runs through ResolutionEngine._fuzzy_search_local and through
+a copy of the old scan, and per-query latency is reported for both. The top match
+of both paths is compared so the speed-up is not bought with different answers.
+
+Usage: python benchmark_fuzzy_search.py [--rows 60000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+WORDS = ["ADANI", "RELIANCE", "TATA", "HDFC", "ICICI", "BAJAJ", "INFOSYS", "WIPRO", "MAHINDRA",
+         "LARSEN", "POWER", "STEEL", "MOTORS", "FINANCE", "BANK", "CHEMICALS", "PHARMA", "TEXTILES",
+         "CEMENT", "ENERGY", "INFRA", "CAPITAL", "HOLDINGS", "GREEN", "AGRO", "FOODS", "LABS",
+         "SYSTEMS", "GLOBAL", "UNITED", "NATIONAL", "SHREE", "SUN", "BHARAT", "JINDAL", "APOLLO"]
+SUFFIXES = ["LIMITED", "LTD", "INDIA LTD", "INDUSTRIES LIMITED", ""]
+
+
+def synthetic_master(rows, seed=7):
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        name = " ".join(words + [rng.choice(SUFFIXES)]).strip().title()
+        symbol = "".join(w[:rng.randint(2, 5)] for w in words) + (str(i % 97) if i % 5 == 0 else "")
+        exchange = "NSE" if i % 2 == 0 else "BSE"
+        segment = "CASH" if i % 3 else "FNO"
+        data.append({
+            "exchange": exchange, "exchange_token": str(i), "trading_symbol": symbol,
+            "groww_symbol": f"{exchange}-{symbol}-{i}", "name": name, "isin": f"INE{i:07d}",
+            "segment": segment, "instrument_type": "EQ",
+        })
+    return pd.DataFrame(data).astype(str)
+
+
+def legacy_scan(df, query):
+    """The pre-index _fuzzy_search_local: regex over every row, then scoring."""
+    clean_q = query.upper().strip()
+    tokens = [t for t in clean_q.split() if len(t) > 1]
+    if not tokens:
+        return None
+    pattern = '|'.join(re.escape(t) for t in tokens)
+    mask = df['search_name'].str.contains(pattern, regex=True, na=False) | \
+           df['search_symbol'].str.contains(pattern, regex=True, na=False)
+    if not mask.any():
+        return None
+    candidates = df[mask].copy()
+    candidates['score'] = 0.0
+    for token in tokens:
+        t_esc = re.escape(token)
+        has_token = candidates['search_name'].str.contains(t_esc, regex=True) | \
+                    candidates['search_symbol'].str.contains(t_esc, regex=True)
+        candidates.loc[has_token, 'score'] += 1.0
+    candidates.loc[candidates['search_symbol'] == clean_q, 'score'] += 5.0
+    candidates.loc[candidates['search_name'] == clean_q, 'score'] += 3.0
+    candidates.loc[candidates['search_name'].str.startswith(clean_q), 'score'] += 2.0
+    diff_name = (candidates['search_name'].str.len() - len(clean_q)).abs()
+    diff_sym = (candidates['search_symbol'].str.len() - len(clean_q)).abs()
+    candidates.loc[:, 'score'] -= (np.minimum(diff_name, diff_sym) * 0.05)
+    candidates = candidates.sort_values(by='score', ascending=False)
+    top = candidates.iloc[0].to_dict()
+    return top if top['score'] >= 0.5 else None
+
+
+def make_queries(df, count, seed=11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        row = df.iloc[rng.randrange(len(df))]
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(row["name"].upper())
+        elif kind < 0.7:
+            queries.append(" ".join(row["name"].split()[:2]))
+        else:
+            queries.append(f"{row['name'].split()[0]} {row['trading_symbol']}")
+    return queries
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def report(label, latencies):
+    ms = [v * 1000 for v in latencies]
+    print(f"{label:<10} p50={percentile(ms, 50):7.2f}ms  p99={percentile(ms, 99):7.2f}ms  "
+          f"mean={sum(ms) / len(ms):7.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["GROWW_CACHE_DIR"] = tempfile.mkdtemp(prefix="groww_bench_")
+    from quantedge_groww import instrument_store, ngram_index
+    from quantedge_groww.resolution_engine import ResolutionEngine
+
+    frame = synthetic_master(args.rows)
+    master = instrument_store.save_master(frame)
+
+    t0 = time.perf_counter()
+    ngram_index.get_index(master)
+    print(f"trigram index build: {(time.perf_counter() - t0) * 1000:.0f}ms for {args.rows} rows")
+
+    engine = ResolutionEngine()
+    engine._build(master)
+
+    full = master.to_frame()
+    full['search_name'] = full['name'].fillna('').astype(str).str.upper()
+    full['search_symbol'] = full['trading_symbol'].fillna('').astype(str).str.upper()
+
+    queries = make_queries(frame, args.queries)
+    scan_times, index_times, mismatches = [], [], 0
+    for q in queries:
+        t0 = time.perf_counter()
+        expected = legacy_scan(full, q)
+        scan_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        got = engine._fuzzy_search_local(q)
+        index_times.append(time.perf_counter() - t0)
+
+        if (expected or {}).get('groww_symbol') != (got or {}).get('groww_symbol'):
+            # Equal scores can tie-break differently; compare scores instead
+            if round((expected or {}).get('score', 0), 6) != round((got or {}).get('score', 0), 6):
+                mismatches += 1
+
+    report("scan", scan_times)
+    report("indexed", index_times)
+    print(f"speed-up (p50): {percentile(scan_times, 50) / percentile(index_times, 50):.1f}x, "
+          f"score mismatches: {mismatches}/{len(queries)}")
@@ -1,56 +1,36 @@
 import json
 import os
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from quantedge_groww.event_study import EventStudy
+from quantedge_groww.market_trends import load_frames
 
 DATA_DIR = "market_trends"
 CONTEXT_FILE = os.path.join(DATA_DIR, "market_context_map.json")
 
 def load_data():
-    all_data = {}
-    for file in os.listdir(DATA_DIR):
-        if file.endswith("_10y.json"):
-            name = file.replace("_10y.json", "")
-            with open(os.path.join(DATA_DIR, file), "r") as f:
-                data = json.load(f)
-                df = pd.DataFrame(data)
-                df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-                df = df.sort_values('date')
-                all_data[name] = df
-    return all_data
+    # Parsed once into a columnar cache; later runs memory-map it
+    return load_frames(DATA_DIR)
 
-def correlate_events(all_data, context):
+def correlate_events(all_data, context, windows=(7, 30, 90)):
     events = context.get("events", [])
-    results = []
     
     nifty_df = all_data.get("NIFTY_50")
     if nifty_df is None:
         return []
         
-    for event in events:
-        event_date = pd.to_datetime(event["date"])
-        
-        # Performance Windows
-        windows = [7, 30, 90]
+    # Forward returns for every event and window in one pass; the 0-day window is
+    # NaN when there is no price at (or after) the event date
+    study = EventStudy({"NIFTY_50": nifty_df})
+    returns = study.forward_returns([pd.to_datetime(e["date"]) for e in events], (0,) + tuple(windows))[:, :, 0]
+    
+    results = []
+    for i, event in enumerate(events):
         performance = {}
-        
-        # Get price at event date (or nearest following)
-        mask = nifty_df['date'] >= event_date
-        event_row = nifty_df[mask].iloc[0] if not nifty_df[mask].empty else None
-        
-        if event_row is not None:
-            start_price = event_row['close']
-            
-            for days in windows:
-                target_date = event_date + timedelta(days=days)
-                t_mask = nifty_df['date'] >= target_date
-                t_row = nifty_df[t_mask].iloc[0] if not nifty_df[t_mask].empty else None
-                
-                if t_row is not None:
-                    ret = ((t_row['close'] - start_price) / start_price) * 100
-                    performance[f"{days}d_return"] = round(ret, 2)
-                else:
-                    performance[f"{days}d_return"] = None
+        if not np.isnan(returns[i, 0]):
+            for w, days in enumerate(windows, start=1):
+                ret = returns[i, w]
+                performance[f"{days}d_return"] = None if np.isnan(ret) else round(float(ret), 2)
         
         results.append({
             **event,
@@ -1,57 +1,46 @@
 import os
 import json
 import datetime
-import time
 from dotenv import load_dotenv
-from quantedge_groww.market_data import get_historical_candles
+from quantedge_groww.backfill import BackfillEngine
 
 # Load environment variables
 load_dotenv(dotenv_path="../.env")
 
-def fetch_index_data_in_chunks(symbol, exchange="NSE"):
-    print(f"Fetching 10 years of data for {symbol} in yearly chunks...")
-    
+def backfill_indices(indices, years=10):
+    """
+    Backfills daily candles for every index in parallel (yearly chunks, rate limited)
+    into the local candle store, then writes market_trends/<name>_10y.json per index.
+    An interrupted run resumes from the checkpoint.
+    """
+    print(f"Fetching {years} years of data for {len(indices)} indices in yearly chunks...")
+
     end_date_total = datetime.datetime.now()
-    start_date_total = end_date_total - datetime.timedelta(days=10*365)
-    
-    all_candles = []
-    current_end = end_date_total
-    
-    # Fetch in 1-year chunks backward
-    for i in range(10):
-        current_start = current_end - datetime.timedelta(days=365)
-        
-        st = current_start.strftime("%Y-%m-%d %H:%M:%S")
-        et = current_end.strftime("%Y-%m-%d %H:%M:%S")
-        
-        try:
-            result = get_historical_candles(
-                trading_symbol=symbol,
-                start_time=st,
-                end_time=et,
-                exchange=exchange,
-                segment="CASH",
-                interval_in_minutes=1440
-            )
-            
-            candles = result.get("candles", [])
-            all_candles.extend(candles)
-            
-            # Update for next chunk
-            current_end = current_start
-            
-            # Short sleep to avoid rate limits
-            time.sleep(0.5)
-            
-        except Exception as e:
-            if "start_time" in str(e).lower() or "duration" in str(e).lower():
-                break
-                
-    # Sort candles by timestamp
-    all_candles.sort(key=lambda x: x['timestamp'])
-    
-    print(f"  Total Success: Retrieved {len(all_candles)} candles for {symbol}")
-    return all_candles
+    start_date_total = end_date_total - datetime.timedelta(days=years*365)
+
+    engine = BackfillEngine(
+        indices,
+        start_time=start_date_total.strftime("%Y-%m-%d %H:%M:%S"),
+        end_time=end_date_total.strftime("%Y-%m-%d %H:%M:%S"),
+        interval_in_minutes=1440
+    )
+
+    def progress(key, item):
+        if item["status"] != "done":
+            print(f"  {key}: {item['status']} ({item['error']['message']})")
+
+    summary = engine.run(progress=progress)
+    print(f"  {summary['chunks']} chunks, {summary['fetchedCandles']} new candles in {summary['elapsedS']}s; "
+          f"{len(summary['failed'])} failed (re-run to resume), {len(summary['rejected'])} rejected")
+
+    for idx in indices:
+        data = engine.candles(idx)
+        print(f"  Total Success: Retrieved {len(data)} candles for {idx['symbol']}")
+        if data:
+            filename = f"market_trends/{idx['name']}_{years}y.json"
+            with open(filename, "w") as f:
+                json.dump(data, f, indent=2)
+            print(f"  Saved to {filename}")
 
 if __name__ == "__main__":
     indices_to_fetch = [
@@ -73,13 +62,6 @@ if __name__ == "__main__":
     ]
     
     os.makedirs("market_trends", exist_ok=True)
-    
-    for idx in indices_to_fetch:
-        data = fetch_index_data_in_chunks(idx["symbol"], idx["exchange"])
-        if data:
-            filename = f"market_trends/{idx['name']}_10y.json"
-            with open(filename, "w") as f:
-                json.dump(data, f, indent=2)
-            print(f"  Saved to {filename}")
-            
+    backfill_indices(indices_to_fetch)
+
     print("\nSectoral and Theme data fetch complete.")
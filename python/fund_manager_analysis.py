@@ -1,57 +1,44 @@
 import json
 import os
-import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
+from quantedge_groww.event_study import EventStudy
+from quantedge_groww.market_trends import load_frames
 
 DATA_DIR = "market_trends"
 INTEL_FILE = os.path.join(DATA_DIR, "FundManagerIntel.json")
 
 def load_data():
-    all_data = {}
-    for file in os.listdir(DATA_DIR):
-        if file.endswith("_10y.json"):
-            name = file.replace("_10y.json", "")
-            with open(os.path.join(DATA_DIR, file), "r") as f:
-                data = json.load(f)
-                df = pd.DataFrame(data)
-                df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-                df = df.sort_values('date')
-                all_data[name] = df
-    return all_data
+    # Parsed once into a columnar cache; later runs memory-map it
+    return load_frames(DATA_DIR)
 
 def analyze_shocks(all_data, intel):
     shocks = intel.get("corporate_crises_and_shocks", [])
-    results = []
-    
+    shock_dates = []
     for shock in shocks:
         date_str = shock["date"]
         # Format can be "YYYY-MM" or "YYYY-MM-DD"
         if len(date_str) == 7:
-            shock_date = datetime.strptime(date_str, "%Y-%m")
+            shock_dates.append(datetime.strptime(date_str, "%Y-%m"))
         else:
-            shock_date = datetime.strptime(date_str, "%Y-%m-%d")
+            shock_dates.append(datetime.strptime(date_str, "%Y-%m-%d"))
             
-        impacted_sector = shock.get("sector")
-        
-        # Performance analysis (30d and 90d)
-        perf_data = {}
-        for idx_name, df in all_data.items():
-            mask = df['date'] >= shock_date
-            if not df[mask].empty:
-                start_row = df[mask].iloc[0]
-                start_price = start_row['close']
-                
-                # Check 30d
-                t30 = shock_date + timedelta(days=30)
-                mask_30 = df['date'] >= t30
-                if not df[mask_30].empty:
-                    end_price = df[mask_30].iloc[0]['close']
-                    perf_data[idx_name] = round(((end_price - start_price) / start_price) * 100, 2)
+    # 30d performance of every index after every shock, in one pass
+    study = EventStudy(all_data)
+    returns = study.forward_returns(shock_dates, [30])[:, 0, :]
+    
+    results = []
+    for i, shock in enumerate(shocks):
+        perf_data = {
+            idx_name: round(float(ret), 2)
+            for idx_name, ret in zip(study.names, returns[i])
+            if not np.isnan(ret)
+        }
         
         results.append({
             "event": shock["event"],
-            "date": date_str,
-            "sector": impacted_sector,
+            "date": shock["date"],
+            "sector": shock.get("sector"),
             "performance_matrix": perf_data
         })
         
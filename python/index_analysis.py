@@ -2,14 +2,20 @@ import json
 import os
 import pandas as pd
 from datetime import datetime
+from quantedge_groww.panel import close_panel, summarize_panel
+from quantedge_groww.market_trends import load_candles
 
 os.makedirs("market_trends", exist_ok=True)
 
 def analyze_index(name, data):
-    if not data or len(data) < 2:
+    # data: list of candle dicts, or columnar {"timestamp": [...], "close": [...], ...}
+    # as returned by get_historical_candles(..., columnar=True)
+    if data is None:
         return None
         
     df = pd.DataFrame(data)
+    if len(df) < 2:
+        return None
     # Groww timestamps are in seconds
     df['date'] = pd.to_datetime(df['timestamp'], unit='s')
     df = df.sort_values('date')
@@ -46,18 +52,29 @@ def analyze_index(name, data):
         "volatility_annualized_pct": round(volatility, 2)
     }
 
-if __name__ == "__main__":
-    files = [f for f in os.listdir("market_trends") if f.endswith("_10y.json")]
+def analyze_indices(series):
+    """
+    analyze_index for many series at once: {name: candles} -> list of summaries.
+    All series share one aligned date x name panel, so this scales to hundreds of
+    series (e.g. every holding in a portfolio).
+    """
+    stats = summarize_panel(close_panel(series))
     summaries = []
-    
-    for file in files:
-        filepath = os.path.join("market_trends", file)
-        with open(filepath, "r") as f:
-            data = json.load(f)
-            name = file.replace("_10y.json", "")
-            summary = analyze_index(name, data)
-            if summary:
-                summaries.append(summary)
+    for name, row in stats.iterrows():
+        summaries.append({
+            "name": name,
+            "period": f"{row['first_date'].date()} to {row['last_date'].date()}",
+            "start_price": round(row['start_price'], 2),
+            "end_price": round(row['end_price'], 2),
+            "total_return_pct": round(row['total_return_pct'], 2),
+            "cagr_pct": round(row['cagr_pct'], 2),
+            "max_drawdown_pct": round(row['max_drawdown_pct'], 2),
+            "volatility_annualized_pct": round(row['volatility_annualized_pct'], 2)
+        })
+    return summaries
+
+if __name__ == "__main__":
+    summaries = analyze_indices(load_candles("market_trends", "_10y.json"))
                 
     # Save summary
     with open("market_trends/indices_analysis_summary.json", "w") as f:
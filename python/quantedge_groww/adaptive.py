@@ -0,0 +1,83 @@
+"""
+Adaptive batch sizing and parallelism for bulk market-data fetches.
+"""
+import os
+import threading
+from .errors import ErrorType
+
+
+class AdaptiveBatchController:
+    """
+    AIMD controller for chunk size and concurrency.
+
+    - Additive increase: every fast, successful chunk nudges concurrency (and, after a
+      previous decrease, chunk size) up by one step.
+    - Multiplicative decrease: RATE_LIMITED halves concurrency; TIMEOUT or a chunk far
+      slower than the target halves the chunk size.
+
+    The controller is process-wide, so in CLI serve mode the learned parameters carry
+    over between refreshes.
+    """
+
+    def __init__(self, batch_size=50, concurrency=3, min_batch=5, max_batch=50,
+                 min_concurrency=1, max_concurrency=8, target_latency_s=1.0,
+                 batch_step=5, decrease_factor=0.5):
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency_s = target_latency_s
+        self.batch_step = batch_step
+        self.decrease_factor = decrease_factor
+        self._batch_size = max(min_batch, min(batch_size, max_batch))
+        self._concurrency = max(min_concurrency, min(concurrency, max_concurrency))
+        self._ewma_latency_s = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            batch_size=int(os.getenv("GROWW_SMART_LTP_BATCH_SIZE", 50)),
+            concurrency=int(os.getenv("GROWW_SMART_LTP_CONCURRENCY", 3)),
+            max_batch=int(os.getenv("GROWW_LTP_MAX_BATCH", 50)),
+            max_concurrency=int(os.getenv("GROWW_SMART_LTP_MAX_CONCURRENCY", 8)),
+            target_latency_s=float(os.getenv("GROWW_SMART_LTP_TARGET_LATENCY_MS", 1000)) / 1000.0,
+        )
+
+    def params(self):
+        """Current (batch_size, concurrency)."""
+        with self._lock:
+            return self._batch_size, self._concurrency
+
+    def record(self, latency_s, error_type=None):
+        """Feeds back one chunk outcome. error_type is an ErrorType or None on success."""
+        with self._lock:
+            if error_type == ErrorType.RATE_LIMITED:
+                self._concurrency = max(self.min_concurrency, int(self._concurrency * self.decrease_factor))
+                return
+            if error_type == ErrorType.TIMEOUT:
+                self._batch_size = max(self.min_batch, int(self._batch_size * self.decrease_factor))
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+                return
+            if error_type is not None:
+                # Bad symbols or auth problems say nothing about upstream capacity
+                return
+
+            if self._ewma_latency_s is None:
+                self._ewma_latency_s = latency_s
+            else:
+                self._ewma_latency_s = 0.7 * self._ewma_latency_s + 0.3 * latency_s
+
+            if latency_s > 2 * self.target_latency_s:
+                self._batch_size = max(self.min_batch, int(self._batch_size * self.decrease_factor))
+            elif latency_s < self.target_latency_s:
+                self._concurrency = min(self.max_concurrency, self._concurrency + 1)
+                self._batch_size = min(self.max_batch, self._batch_size + self.batch_step)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "batchSize": self._batch_size,
+                "concurrency": self._concurrency,
+                "ewmaLatencyMs": round(self._ewma_latency_s * 1000, 1) if self._ewma_latency_s is not None else None,
+            }
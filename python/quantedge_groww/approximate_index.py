@@ -0,0 +1,183 @@
+"""
+Approximate (edit-distance bounded) matching over trading symbols and normalized names.
+
+SymSpell-style deletion index: every key contributes the hashes of all strings obtained
+by deleting up to MAX_EDITS characters from its first PREFIX_LENGTH characters. A query
+generates the same deletes for its own prefix; keys sharing any delete hash are the
+candidates, and only those are verified with an optimal-string-alignment distance
+(adjacent transpositions count as one edit, so "RELAINCE" is 1 away from "RELIANCE").
+
+Lookups are a few binary searches instead of a scan. Arrays are stored per master
+version under v<version>/approximate_index/ next to the resolution index.
+"""
+from itertools import combinations
+import numpy as np
+from . import instrument_store
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+INDEX_DIR = "approximate_index"
+KINDS = ("symbol", "name")
+PREFIX_LENGTH = 7
+MAX_EDITS = 2
+_HASH_MULT = np.uint64(1000003)
+
+# Deleted prefix positions for 0, 1 and 2 edits
+_COMBOS = [()] + [c for k in range(1, MAX_EDITS + 1) for c in combinations(range(PREFIX_LENGTH), k)]
+
+
+def max_distance(text):
+    """Edit budget by length: short strings must match exactly (too many near neighbours)."""
+    n = len(text)
+    return 0 if n < 5 else min(MAX_EDITS, n - 4)
+
+
+def _prefix_points(values):
+    arr = np.asarray(values, dtype=str)
+    width = max(arr.dtype.itemsize // 4, 1)
+    points = np.ascontiguousarray(arr).view(np.uint32).reshape(len(arr), width)
+    out = np.zeros((len(arr), PREFIX_LENGTH), dtype=np.uint64)
+    take = min(width, PREFIX_LENGTH)
+    out[:, :take] = points[:, :take]
+    return out
+
+
+def _delete_hashes(points):
+    """(n, len(_COMBOS)) hashes of each prefix with the combo's positions deleted."""
+    out = np.empty((len(points), len(_COMBOS)), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for k, combo in enumerate(_COMBOS):
+            h = np.zeros(len(points), dtype=np.uint64)
+            for j in range(PREFIX_LENGTH):
+                if j in combo:
+                    continue
+                c = points[:, j]
+                # Padding is skipped, so the hash only depends on the remaining characters
+                h = np.where(c != 0, h * _HASH_MULT + c, h)
+            out[:, k] = h
+    return out
+
+
+def build_arrays(keys):
+    keys = np.unique(np.asarray(keys, dtype=str))
+    keys = keys[keys != '']
+    hashes = _delete_hashes(_prefix_points(keys))
+    ids = np.repeat(np.arange(len(keys), dtype=np.int32), hashes.shape[1])
+    hashes = hashes.ravel()
+
+    order = np.lexsort((ids, hashes))
+    hashes, ids = hashes[order], ids[order]
+    if len(hashes):
+        keep = np.ones(len(hashes), dtype=bool)
+        keep[1:] = (hashes[1:] != hashes[:-1]) | (ids[1:] != ids[:-1])
+        hashes, ids = hashes[keep], ids[keep]
+    return {"keys": keys, "hashes": hashes, "ids": ids}
+
+
+def osa_distance(a, b, limit):
+    """
+    Optimal string alignment distance, or limit + 1 once it must exceed `limit`.
+    Only the diagonal band |i - j| <= limit of the DP table is computed.
+    """
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    over = limit + 1
+    prev2 = None
+    prev = [j if j <= limit else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        cur = [over] * (m + 1)
+        if i <= limit:
+            cur[0] = i
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        best = cur[0]
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (ai != b[j - 1])
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d if d < over else over
+            if d < best:
+                best = d
+        if best > limit:
+            return over
+        prev2, prev = prev, cur
+    return prev[m]
+
+
+class DeletionIndex:
+    """Edit-distance bounded lookup over one set of keys."""
+
+    def __init__(self, keys, hashes, ids):
+        self.keys = keys
+        self.hashes = hashes
+        self.ids = ids
+        self.key_lengths = np.char.str_len(np.asarray(keys)) if len(keys) else np.array([], dtype=int)
+
+    def candidates(self, text):
+        """Key ids sharing at least one prefix-delete hash with `text`."""
+        if not text or not len(self.hashes):
+            return np.array([], dtype=np.int32)
+        wanted = np.unique(_delete_hashes(_prefix_points([text]))[0])
+        lo = np.searchsorted(self.hashes, wanted, side='left')
+        hi = np.searchsorted(self.hashes, wanted, side='right')
+        lengths = hi - lo
+        if not lengths.sum():
+            return np.array([], dtype=np.int32)
+        base = np.repeat(lo - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.unique(self.ids[base + np.arange(int(lengths.sum()))])
+
+    def lookup(self, text, limit=None, extra_keys=()):
+        """
+        Ranked [(key, distance, score)] within max_distance(text) edits.
+        score = 1 - distance / max(len(text), len(key)). `extra_keys` (e.g. keys added
+        by incremental changes after the index was built) are checked directly.
+        """
+        budget = max_distance(text)
+        if budget == 0:
+            return []
+        ids = self.candidates(text)
+        if len(ids):
+            ids = ids[np.abs(self.key_lengths[ids] - len(text)) <= budget]
+        found = {}
+        for key in [str(self.keys[i]) for i in ids] + [k for k in extra_keys if k]:
+            if key in found or key == text:
+                continue
+            d = osa_distance(text, key, budget)
+            if d <= budget:
+                found[key] = d
+        ranked = sorted(
+            ((key, d, round(1.0 - d / max(len(text), len(key)), 4)) for key, d in found.items()),
+            key=lambda r: (r[1], -r[2], r[0]),
+        )
+        return ranked[:limit] if limit else ranked
+
+
+def load_or_build(master, sources):
+    """
+    {kind: DeletionIndex} for a master version. `sources` maps kind -> key array
+    (the sorted keys of the resolution index); used only when nothing is stored yet.
+    """
+    names = [f"{kind}_{part}" for kind in KINDS for part in ("keys", "hashes", "ids")]
+    arrays = None
+    try:
+        arrays = instrument_store.load_derived(master, INDEX_DIR, names)
+    except Exception as e:
+        logger.warning(f"ApproximateIndex: stored index unreadable ({e}); rebuilding")
+    if arrays is None:
+        logger.info(f"ApproximateIndex: building deletion index for master {master.version}")
+        arrays = {}
+        for kind in KINDS:
+            for part, arr in build_arrays(sources[kind]).items():
+                arrays[f"{kind}_{part}"] = arr
+        try:
+            instrument_store.save_derived(master, INDEX_DIR, arrays)
+        except Exception as e:
+            logger.warning(f"ApproximateIndex: could not persist index ({e})")
+    return {kind: DeletionIndex(arrays[f"{kind}_keys"], arrays[f"{kind}_hashes"], arrays[f"{kind}_ids"])
+            for kind in KINDS}
@@ -1,6 +1,7 @@
 import os
 import time
 import sys
+import threading
 import importlib.metadata
 import tempfile
 import json
@@ -8,6 +9,7 @@ from packaging import version
 from growwapi import GrowwAPI
 from .errors import GrowwError, ErrorType
 from .logging_config import setup_logging
+from .rate_limiter import RateLimitedClient, rate_limiter
 
 logger = setup_logging()
 
@@ -19,6 +21,8 @@ MIN_SDK_VERSION = "1.0.0" # Example constraint, adjust as needed based on actual
 class AuthManager:
     _client_instance = None
     _permission_model = None
+    # Serve-mode workers share one client; only one of them may create it
+    _client_lock = threading.Lock()
 
     @staticmethod
     def check_sdk_version():
@@ -64,7 +68,15 @@ class AuthManager:
     def get_client(force_refresh=False):
         if AuthManager._client_instance and not force_refresh:
             return AuthManager._client_instance
-            
+
+        with AuthManager._client_lock:
+            # Another thread may have created the client while we waited for the lock
+            if AuthManager._client_instance and not force_refresh:
+                return AuthManager._client_instance
+            return AuthManager._create_client(force_refresh)
+
+    @staticmethod
+    def _create_client(force_refresh=False):
         AuthManager.check_sdk_version()
         auth_mode = os.getenv("GROWW_AUTH_MODE", "API_KEY_SECRET")
 
@@ -79,12 +91,15 @@ class AuthManager:
                             access_token = cache.get("access_token")
                             if access_token:
                                 logger.info("Using cached Groww access token.")
-                                AuthManager._client_instance = GrowwAPI(access_token)
+                                AuthManager._client_instance = RateLimitedClient(GrowwAPI(access_token))
                                 return AuthManager._client_instance
             except Exception as cache_err:
                 logger.warning(f"Failed to read token cache: {cache_err}")
 
         try:
+            # Token acquisition is an SDK call too; keep it inside the metadata budget
+            rate_limiter.acquire("NON_TRADING")
+
             if auth_mode == "TOTP":
                  token = os.getenv("GROWW_API_KEY") 
                  secret = os.getenv("GROWW_TOTP_SECRET")
@@ -119,7 +134,7 @@ class AuthManager:
             except Exception as save_err:
                 logger.warning(f"Failed to save token cache: {save_err}")
 
-            AuthManager._client_instance = GrowwAPI(access_token)
+            AuthManager._client_instance = RateLimitedClient(GrowwAPI(access_token))
             
             # Preflight profile check
             if os.getenv("GROWW_PROFILE_PREFLIGHT", "true").lower() == "true":
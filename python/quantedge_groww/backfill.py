@@ -0,0 +1,167 @@
+"""
+Parallel historical backfill into the candle store.
+
+A backfill splits [start, end] for every series into fixed-size chunks and fetches the
+(series, chunk) work items on a thread pool. Every SDK call still goes through the
+process-wide rate limiter (RateLimitedClient), so the pool only overlaps latency; it does
+not raise the request rate. Each chunk is appended to the candle store as soon as it
+arrives, so nothing accumulates in memory.
+
+Progress is checkpointed to a JSON file after every chunk. Re-running with the same
+checkpoint resumes: finished chunks are skipped and failed ones are retried (chunks
+rejected for good, e.g. before the available history, are not). Chunks the
+candle store already covers cost no upstream call either way.
+"""
+import os
+import json
+import hashlib
+import time
+import threading
+import concurrent.futures
+from .candle_store import STORE_DIR, candle_store
+from .errors import GrowwError, ErrorType, classify_exception
+from .market_data import fill_candle_store, _candle_dicts, _to_epoch
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+BACKFILL_WORKERS = int(os.getenv("GROWW_BACKFILL_WORKERS", 4))
+CHECKPOINT_DIR = os.path.join(STORE_DIR, "backfill")
+DAY_S = 86400
+# Errors that will not go away on retry (bad symbol, no entitlement, range beyond the
+# available history); such chunks are marked "rejected" and not retried on resume.
+TERMINAL_ERRORS = (ErrorType.VALIDATION_ERROR, ErrorType.PERMISSION_DENIED, ErrorType.AUTHORIZATION_FAILED)
+
+
+def plan_chunks(start_ts, end_ts, chunk_days=365):
+    """[(start, end)] inclusive chunks covering [start_ts, end_ts], newest first."""
+    chunks = []
+    cursor = int(end_ts)
+    step = int(chunk_days * DAY_S)
+    while cursor >= start_ts:
+        chunk_start = max(int(start_ts), cursor - step + 1)
+        chunks.append((chunk_start, cursor))
+        cursor = chunk_start - 1
+    return chunks
+
+
+def _series_key(series):
+    return f"{series.get('exchange', 'NSE')}|{series.get('segment', 'CASH')}|{series['symbol']}"
+
+
+class BackfillEngine:
+    """
+    series: [{"symbol": ..., "exchange": "NSE", "segment": "CASH"}, ...]
+    checkpoint: path of the JSON progress file (default: one per series set and interval,
+    under the candle store).
+    """
+
+    def __init__(self, series, start_time, end_time, interval_in_minutes=1440, chunk_days=365,
+                 checkpoint=None, max_workers=None):
+        self.series = [dict(s, exchange=s.get("exchange", "NSE"), segment=s.get("segment", "CASH")) for s in series]
+        self.interval = int(interval_in_minutes)
+        self.chunk_days = chunk_days
+        self.max_workers = max_workers or BACKFILL_WORKERS
+        if checkpoint is None:
+            digest = hashlib.sha1(json.dumps(self._spec()).encode()).hexdigest()[:12]
+            checkpoint = os.path.join(CHECKPOINT_DIR, f"{self.interval}m-{digest}.json")
+        self.checkpoint = checkpoint
+        self._lock = threading.Lock()
+
+        state = self._load_checkpoint()
+        if state is not None:
+            # Resume the interrupted run with its original range, so chunk keys line up
+            self.start_ts, self.end_ts = state["start"], state["end"]
+            self.items = state["items"]
+            logger.info(f"Backfill: resuming {self.checkpoint} "
+                        f"({sum(1 for i in self.items.values() if i['status'] == 'done')}/{len(self.items)} done)")
+        else:
+            self.start_ts, self.end_ts = _to_epoch(start_time), _to_epoch(end_time)
+            self.items = {}
+        for s in self.series:
+            for chunk_start, chunk_end in plan_chunks(self.start_ts, self.end_ts, chunk_days):
+                key = f"{_series_key(s)}|{chunk_start}|{chunk_end}"
+                self.items.setdefault(key, {"status": "pending", "attempts": 0})
+
+    def _spec(self):
+        return {"series": sorted(_series_key(s) for s in self.series), "interval": self.interval,
+                "chunkDays": self.chunk_days}
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("spec") != self._spec() or state.get("complete"):
+            return None
+        return state
+
+    def _save_checkpoint(self, complete=False):
+        # Caller holds self._lock
+        os.makedirs(os.path.dirname(self.checkpoint) or ".", exist_ok=True)
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"spec": self._spec(), "start": self.start_ts, "end": self.end_ts,
+                       "complete": complete, "items": self.items}, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _run_item(self, key):
+        exchange, segment, symbol, chunk_start, chunk_end = key.split("|")
+        return fill_candle_store(symbol, int(chunk_start), int(chunk_end), exchange, segment, self.interval)
+
+    def run(self, progress=None):
+        """
+        Fetches every pending or failed chunk. Returns a summary; failed and rejected
+        chunks are listed with their error type instead of stopping the run.
+        `progress(key, item)` is called after each chunk.
+        """
+        todo = [k for k, item in self.items.items() if item["status"] in ("pending", "failed")]
+        fetched = 0
+        started = time.monotonic()
+        with self._lock:
+            self._save_checkpoint()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._run_item, key): key for key in todo}
+            for future in concurrent.futures.as_completed(futures):
+                key = futures[future]
+                with self._lock:
+                    item = self.items[key]
+                    item["attempts"] += 1
+                    try:
+                        stored = future.result()
+                        item.update(status="done", candles=stored["fetchedCandles"])
+                        item.pop("error", None)
+                        fetched += stored["fetchedCandles"]
+                    except Exception as e:
+                        error_type = classify_exception(e)
+                        message = e.message if isinstance(e, GrowwError) else str(e)
+                        terminal = error_type in TERMINAL_ERRORS or "start_time" in message.lower() \
+                            or "duration" in message.lower()
+                        item.update(status="rejected" if terminal else "failed",
+                                    error={"type": error_type.value, "message": message})
+                        logger.warning(f"Backfill: {key} failed ({error_type.value}): {message}")
+                    self._save_checkpoint()
+                if progress:
+                    progress(key, item)
+
+        failed = {k: item["error"] for k, item in self.items.items() if item["status"] == "failed"}
+        rejected = {k: item["error"] for k, item in self.items.items() if item["status"] == "rejected"}
+        with self._lock:
+            # Only retryable failures keep the checkpoint open for a resume
+            self._save_checkpoint(complete=not failed)
+        return {
+            "chunks": len(self.items),
+            "attempted": len(todo),
+            "failed": failed,
+            "rejected": rejected,
+            "fetchedCandles": fetched,
+            "elapsedS": round(time.monotonic() - started, 2),
+        }
+
+    def candles(self, series):
+        """Stored candles of one series over the backfilled range (get_historical_candles dicts)."""
+        s = dict(series, exchange=series.get("exchange", "NSE"), segment=series.get("segment", "CASH"))
+        columns = candle_store.read(s["exchange"], s["segment"], s["symbol"], self.interval, self.start_ts, self.end_ts)
+        return _candle_dicts(columns)
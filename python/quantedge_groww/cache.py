@@ -0,0 +1,195 @@
+"""
+In-process caches shared across requests (most useful in CLI serve mode).
+"""
+import os
+import json
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-namespace time-to-live.
+
+    Entries are keyed by (namespace, key). A lookup older than the namespace TTL is a
+    miss and is dropped. When more than `max_entries` are stored, the least recently
+    used entry is evicted.
+    """
+
+    def __init__(self, ttls, max_entries=5000, clock=time.monotonic):
+        self.ttls = dict(ttls)        # namespace -> seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data = OrderedDict()    # (namespace, key) -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, namespace, key):
+        """Returns (value, age_seconds) or None on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            age = now - stored_at
+            if age > self.ttls.get(namespace, 0):
+                del self._data[(namespace, key)]
+                self.misses += 1
+                return None
+            self._data.move_to_end((namespace, key))
+            self.hits += 1
+            return value, age
+
+    def put(self, namespace, key, value):
+        if self.ttls.get(namespace, 0) <= 0:
+            return
+        with self._lock:
+            self._data[(namespace, key)] = (self._clock(), value)
+            self._data.move_to_end((namespace, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _ttl_from_env(name, default_ms):
+    return float(os.getenv(name, default_ms)) / 1000.0
+
+
+def build_price_cache():
+    """
+    Price cache with freshness per command:
+    LTP 1s, OHLC 30s, quote 2s by default (GROWW_CACHE_TTL_{LTP,OHLC,QUOTE}_MS).
+    Set a TTL to 0 to disable caching for that command.
+    """
+    return TTLCache(
+        ttls={
+            "ltp": _ttl_from_env("GROWW_CACHE_TTL_LTP_MS", 1000),
+            "ohlc": _ttl_from_env("GROWW_CACHE_TTL_OHLC_MS", 30000),
+            "quote": _ttl_from_env("GROWW_CACHE_TTL_QUOTE_MS", 2000),
+        },
+        max_entries=int(os.getenv("GROWW_PRICE_CACHE_MAX_ENTRIES", 5000)),
+    )
+
+
+def build_memo_cache(env_name, default_max_entries):
+    """
+    Bounded LRU memo (no expiry) under the "memo" namespace, sized by `env_name`.
+    Used for pure lookups whose owners clear it when their inputs change.
+    """
+    return TTLCache(
+        ttls={"memo": float("inf")},
+        max_entries=int(os.getenv(env_name, default_max_entries)),
+    )
+
+
+INVALID_SYMBOLS_FILE = os.path.join(tempfile.gettempdir(), 'groww_invalid_symbols.json')
+
+
+class NegativeCache:
+    """
+    Remembers keys known to be invalid upstream (e.g. delisted symbols that make a
+    whole get_ltp batch fail) for `ttl_s` seconds, persisted to a JSON file so the
+    knowledge survives one-shot CLI processes.
+    """
+
+    def __init__(self, path=INVALID_SYMBOLS_FILE, ttl_s=None):
+        self.path = path
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("GROWW_INVALID_SYMBOL_TTL_S", 6 * 3600))
+        self._lock = threading.Lock()
+        self._expires = None  # key -> expiry epoch seconds, loaded lazily
+
+    def _load(self):
+        if self._expires is not None:
+            return
+        self._expires = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                now = time.time()
+                self._expires = {k: v for k, v in data.items() if v > now}
+        except Exception as e:
+            logger.warning(f"Failed to read invalid-symbol cache: {e}")
+
+    def _save(self):
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._expires, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save invalid-symbol cache: {e}")
+
+    def contains(self, key):
+        with self._lock:
+            self._load()
+            expiry = self._expires.get(key)
+            if expiry is None:
+                return False
+            if expiry <= time.time():
+                del self._expires[key]
+                return False
+            return True
+
+    def add_many(self, keys):
+        keys = list(keys)
+        if not keys or self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._load()
+            expiry = time.time() + self.ttl_s
+            for key in keys:
+                self._expires[key] = expiry
+            self._save()
+
+    def discard(self, key):
+        """Forgets `key`; returns True if it was cached."""
+        with self._lock:
+            self._load()
+            if self._expires.pop(key, None) is not None:
+                self._save()
+                return True
+            return False
+
+    def clear(self):
+        """Forgets every key; returns how many were cached."""
+        with self._lock:
+            self._load()
+            count = len(self._expires)
+            if count:
+                self._expires = {}
+                self._save()
+            return count
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._expires)
@@ -0,0 +1,224 @@
+"""
+Persistent local store for historical candles.
+
+Layout (under GROWW_CACHE_DIR, default the system temp dir):
+
+    groww_candles/<EXCHANGE>/<SEGMENT>/<SYMBOL>/<interval>m/
+        meta.json          -> {"data", "rows", "sorted", "lastTs", "coverage": [[start, end], ...]}
+        d<n>/<column>.bin  raw little-endian columns: ts int64 (epoch s), open..volume float64
+
+Appending a fetch writes each column's new rows at the end of its file, so storing a
+gap is proportional to the gap. Rows appended out of order (e.g. an older range filled
+in later) are sorted and de-duplicated lazily on the next read (compaction into a new
+d<n> directory, then meta.json is swapped atomically).
+
+`coverage` records which [start, end] epoch-second ranges were already fetched,
+including ranges that returned no candles (holidays), so only the missing
+parts of a request go upstream.
+"""
+import os
+import json
+import shutil
+import threading
+import numpy as np
+from .instrument_store import CACHE_DIR
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+STORE_DIR = os.getenv("GROWW_CANDLE_STORE_DIR", os.path.join(CACHE_DIR, "groww_candles"))
+COLUMNS = (("ts", np.int64), ("open", np.float64), ("high", np.float64),
+           ("low", np.float64), ("close", np.float64), ("volume", np.float64))
+META_FILE = "meta.json"
+
+
+def candles_to_columns(rows):
+    """[[ts, o, h, l, c, v], ...] (SDK form) -> {column: array}. Missing values become NaN."""
+    if not len(rows):
+        return {name: np.array([], dtype=dtype) for name, dtype in COLUMNS}
+    # None (e.g. index volume) becomes NaN in a float array
+    table = np.asarray([r[:6] for r in rows], dtype=np.float64)
+    out = {"ts": table[:, 0].astype(np.int64)}
+    for k, (name, _) in enumerate(COLUMNS[1:], start=1):
+        out[name] = table[:, k]
+    return out
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract_ranges(start, end, covered):
+    """Parts of [start, end] not inside any covered range."""
+    missing = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            missing.append((cursor, min(end, c_start - 1)))
+        cursor = max(cursor, c_end + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+class CandleStore:
+    """
+    Thread-safe within one process (one lock per series). Separate processes writing
+    the same series concurrently are not coordinated.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _series_dir(self, exchange, segment, symbol, interval):
+        safe = symbol.replace(os.sep, "_")
+        return os.path.join(self.root, exchange, segment, safe, f"{int(interval)}m")
+
+    def _lock(self, path):
+        with self._locks_guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, META_FILE), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"data": "d0", "rows": 0, "sorted": True, "lastTs": None, "coverage": []}
+
+    def _write_meta(self, path, meta):
+        tmp = os.path.join(path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, META_FILE))
+
+    def intervals(self, exchange, segment, symbol):
+        """Intervals (minutes) stored for a symbol, finest first."""
+        base = os.path.dirname(self._series_dir(exchange, segment, symbol, 1))
+        try:
+            names = os.listdir(base)
+        except OSError:
+            return []
+        return sorted(int(n[:-1]) for n in names
+                      if n.endswith("m") and n[:-1].isdigit() and os.path.exists(os.path.join(base, n, META_FILE)))
+
+    def coverage(self, exchange, segment, symbol, interval):
+        path = self._series_dir(exchange, segment, symbol, interval)
+        with self._lock(path):
+            return [tuple(r) for r in self._read_meta(path)["coverage"]]
+
+    def signature(self, exchange, segment, symbol, interval):
+        """Changes whenever the series' rows or coverage change (cache keys)."""
+        path = self._series_dir(exchange, segment, symbol, interval)
+        with self._lock(path):
+            meta = self._read_meta(path)
+        return meta["data"], meta["rows"], meta["lastTs"], len(meta["coverage"]), \
+            meta["coverage"][-1][1] if meta["coverage"] else None
+
+    def missing(self, exchange, segment, symbol, interval, start_ts, end_ts):
+        """Sub-ranges of [start_ts, end_ts] (epoch seconds, inclusive) not fetched yet."""
+        covered = self.coverage(exchange, segment, symbol, interval)
+        return _subtract_ranges(int(start_ts), int(end_ts), covered)
+
+    def append(self, exchange, segment, symbol, interval, columns, covered_range=None):
+        """
+        Appends candles ({column: array}) and marks `covered_range` (start, end) as fetched.
+        Only the new rows are written.
+        """
+        path = self._series_dir(exchange, segment, symbol, interval)
+        with self._lock(path):
+            os.makedirs(path, exist_ok=True)
+            meta = self._read_meta(path)
+            data_dir = os.path.join(path, meta["data"])
+            os.makedirs(data_dir, exist_ok=True)
+
+            ts = np.asarray(columns["ts"], dtype=np.int64)
+            n = len(ts)
+            if n:
+                for name, dtype in COLUMNS:
+                    arr = np.ascontiguousarray(columns[name], dtype=dtype)
+                    file_path = os.path.join(data_dir, f"{name}.bin")
+                    # Write at the committed length: bytes from an interrupted append are overwritten
+                    with open(file_path, "r+b" if os.path.exists(file_path) else "wb") as f:
+                        f.seek(meta["rows"] * np.dtype(dtype).itemsize)
+                        f.write(arr.tobytes())
+                        f.truncate()
+                in_order = bool(np.all(np.diff(ts) > 0))
+                after_last = meta["lastTs"] is None or int(ts[0]) > meta["lastTs"]
+                meta["sorted"] = meta["sorted"] and in_order and after_last
+                meta["lastTs"] = max(int(ts.max()), meta["lastTs"] or int(ts.max()))
+                meta["rows"] += n
+
+            if covered_range is not None:
+                meta["coverage"] = _merge_ranges(meta["coverage"] + [list(map(int, covered_range))])
+            self._write_meta(path, meta)
+
+    def read(self, exchange, segment, symbol, interval, start_ts=None, end_ts=None):
+        """{column: array} for candles with start_ts <= ts <= end_ts, sorted by ts."""
+        path = self._series_dir(exchange, segment, symbol, interval)
+        with self._lock(path):
+            meta = self._read_meta(path)
+            if meta["rows"] and not meta["sorted"]:
+                meta = self._compact(path, meta)
+            columns = self._load(path, meta)
+
+        ts = columns["ts"]
+        lo = 0 if start_ts is None else int(np.searchsorted(ts, int(start_ts), side="left"))
+        hi = len(ts) if end_ts is None else int(np.searchsorted(ts, int(end_ts), side="right"))
+        return {name: np.array(arr[lo:hi]) for name, arr in columns.items()}
+
+    def _load(self, path, meta, mmap=True):
+        data_dir = os.path.join(path, meta["data"])
+        out = {}
+        for name, dtype in COLUMNS:
+            file_path = os.path.join(data_dir, f"{name}.bin")
+            if not meta["rows"] or not os.path.exists(file_path):
+                out[name] = np.array([], dtype=dtype)
+            elif mmap:
+                out[name] = np.memmap(file_path, dtype=dtype, mode="r", shape=(meta["rows"],))
+            else:
+                out[name] = np.fromfile(file_path, dtype=dtype, count=meta["rows"])
+        return out
+
+    def _compact(self, path, meta):
+        """Sorts by ts and keeps the most recently appended row per timestamp."""
+        columns = self._load(path, meta, mmap=False)
+        ts = columns["ts"]
+        order = np.argsort(ts, kind="stable")
+        sorted_ts = ts[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_ts[1:] != sorted_ts[:-1]
+        keep = order[last]
+
+        old_dir = meta["data"]
+        new_dir = f"d{int(old_dir[1:]) + 1}"
+        os.makedirs(os.path.join(path, new_dir), exist_ok=True)
+        for name, dtype in COLUMNS:
+            columns[name][keep].astype(dtype).tofile(os.path.join(path, new_dir, f"{name}.bin"))
+
+        meta = dict(meta, data=new_dir, rows=int(len(keep)), sorted=True,
+                    lastTs=int(ts[keep][-1]) if len(keep) else None)
+        self._write_meta(path, meta)
+        shutil.rmtree(os.path.join(path, old_dir), ignore_errors=True)
+        logger.info(f"CandleStore: compacted {path} to {meta['rows']} rows")
+        return meta
+
+
+# Process-wide store
+candle_store = CandleStore()
@@ -1,9 +1,20 @@
 """
 Groww CLI Entry Point
 Single JSON-in/JSON-out interface for Node.js to Python communication.
+
+Modes:
+  python -m quantedge_groww.cli                    One JSON request on stdin, one response, exit.
+  python -m quantedge_groww.cli --serve            Newline-delimited JSON requests on stdin,
+                                                   one response line per request (tagged by requestId).
+  python -m quantedge_groww.cli --serve --socket P Same protocol over a Unix domain socket at path P.
+
+In serve mode the process stays alive, so the Groww client, instrument cache and
+ResolutionEngine indices are built once and reused across requests.
 """
 import sys
 import json
+import time
+import threading
 from dotenv import load_dotenv
 import os
 
@@ -12,106 +23,215 @@ load_dotenv(".env")
 load_dotenv("../.env")
 
 from .logging_config import setup_logging
-from .errors import GrowwError
+from .errors import GrowwError, ErrorType
 from .auth import AuthManager
 
 logger = setup_logging()
 
-def main():
+_started_at = time.time()
+
+
+def dispatch(command, payload):
+    """
+    Runs a single command and returns its response data (a dict).
+    Raises GrowwError for known failures.
+    """
+    response_data = {}
+
+    # --- COMMAND DISPATCH ---
+
+    if command == "AUTH_DIAGNOSE":
+        from .health import diagnose_auth
+        response_data = diagnose_auth()
+
+    elif command == "ping":
+        response_data = {"pong": True, "uptimeS": round(time.time() - _started_at, 3)}
+
+    elif command == "user_profile":
+        from .auth import AuthManager
+        response_data = AuthManager.get_user_profile_data()
+
+    elif command == "ltp_batch":
+        from .market_data import get_ltp
+        symbols = payload.get("exchangeTradingSymbols", payload.get("symbols", []))
+        segment = payload.get("segment", "CASH")
+        response_data = get_ltp(symbols, segment)
+
+    elif command == "smart_ltp":
+        from .market_data import get_smart_ltp
+        # Payload 'items' might be list of strings or objects
+        items = payload.get("items", payload.get("symbols", []))
+        response_data = get_smart_ltp(items)
+
+    elif command == "ohlc_batch":
+        from .market_data import get_ohlc
+        symbols = payload.get("exchangeTradingSymbols", payload.get("symbols", []))
+        segment = payload.get("segment", "CASH")
+        response_data = get_ohlc(symbols, segment)
+
+    elif command == "quote":
+        from .market_data import get_quote
+        response_data = get_quote(
+            payload.get("tradingSymbol"),
+            payload.get("exchange", "NSE"),
+            payload.get("segment", "CASH")
+        )
+
+    elif command == "historical_daily":
+        from .market_data import get_historical_candles, serialize_candle_columns
+        columnar = payload.get("format") == "columnar"
+        response_data = get_historical_candles(
+            payload.get("tradingSymbol"),
+            payload.get("start"),
+            payload.get("end"),
+            payload.get("exchange", "NSE"),
+            payload.get("segment", "CASH"),
+            payload.get("intervalMinutes", 1440),
+            columnar=columnar
+        )
+        if columnar:
+            response_data["candles"] = serialize_candle_columns(
+                response_data["candles"], payload.get("encoding", "list"))
+
+    elif command == "covariance":
+        from .covariance import estimate, to_payload
+        # Symbols: "NSE_RELIANCE" strings or {"symbol", "exchange", "segment"} objects
+        response_data = to_payload(estimate(
+            payload.get("symbols", payload.get("items", [])),
+            window=payload.get("window", 252),
+            as_of=payload.get("asOf"),
+            method=payload.get("method", "sample"),
+            ewma_lambda=payload.get("lambda", 0.94),
+            shrinkage=payload.get("shrinkage", "auto")
+        ), annualize=payload.get("annualize", True))
+
+    elif command == "monte_carlo":
+        from .monte_carlo import run_monte_carlo
+        # Holdings: [{"symbol": "NSE_RELIANCE", "value": 150000} | {"symbol", "quantity", "price"?}]
+        response_data = run_monte_carlo(
+            payload.get("holdings", []),
+            paths=payload.get("paths", 20000),
+            horizon_days=payload.get("horizonDays", 1),
+            window=payload.get("window", 252),
+            as_of=payload.get("asOf"),
+            method=payload.get("method", "ewma"),
+            shrinkage=payload.get("shrinkage", "auto"),
+            seed=payload.get("seed"),
+            workers=payload.get("workers", 1)
+        )
+
+    elif command == "holdings":
+        from .portfolio import get_holdings
+        response_data = get_holdings()
+
+    elif command == "positions":
+        from .portfolio import get_positions
+        segment = payload.get("segment")
+        response_data = get_positions(segment)
+
+    elif command == "search_instrument":
+        from .instruments import search_instrument
+        result = search_instrument(
+            payload.get("query"),
+            payload.get("exchange", "NSE"),
+            payload.get("segment", "CASH")
+        )
+        response_data = {"result": result}
+
+    elif command == "resolve_instruments":
+        from .resolution_engine import engine as resolution_engine
+        # Re-checks the instrument master (as get_smart_ltp does) so a long-lived
+        # process picks up new master versions and drops the stale memo
+        resolution_engine.initialize()
+        queries = payload.get("queries", payload.get("items", []))
+        results = resolution_engine.resolve_many(queries, payload.get("enabledExchanges"))
+        items = []
+        for idx, res in enumerate(results):
+            instr = res["instrument"] or {}
+            items.append({
+                "index": idx,
+                "resolved": res["instrument"] is not None,
+                "tier": res["tier"],
+                "confidence": res["confidence"],
+                "exchange": instr.get("exchange"),
+                "segment": instr.get("segment"),
+                "tradingSymbol": instr.get("trading_symbol"),
+                "growwSymbol": instr.get("groww_symbol"),
+                "name": instr.get("name"),
+                "isin": instr.get("isin"),
+            })
+        response_data = {"items": items}
+
+    elif command == "cache_stats":
+        from .market_data import price_cache
+        from .resolution_engine import engine as resolution_engine
+        response_data = {
+            "price": price_cache.stats(),
+            "resolution": resolution_engine.cache_stats(),
+        }
+
+    elif command == "clear_invalid_symbols":
+        # Omitting "symbols" clears every remembered invalid symbol
+        from .market_data import clear_invalid_symbols
+        cleared = clear_invalid_symbols(payload.get("symbols"), payload.get("segment", "CASH"))
+        response_data = {"cleared": cleared}
+
+    elif command == "get_instrument":
+        from .instruments import get_instrument_by_groww_symbol
+        result = get_instrument_by_groww_symbol(payload.get("growwSymbol"))
+        response_data = {"result": result}
+
+    elif command == "get_all_instruments":
+        from .instruments import get_all_instruments
+        response_data = get_all_instruments()
+
+    elif command == "sync_instruments":
+        from .instruments import sync_instruments
+        from .resolution_engine import engine as resolution_engine
+        result = sync_instruments(force_refresh=payload.get("force", True))
+        master, change = result["master"], result["change"]
+        if resolution_engine._initialized:
+            resolution_engine.refresh()
+        response_data = {
+            "version": master.version,
+            "count": master.rows,
+            "change": {
+                "fromVersion": change["fromVersion"],
+                "toVersion": change["toVersion"],
+                "counts": change["counts"],
+                "fullRebuild": change["fullRebuild"],
+            } if change else None,
+        }
+
+    else:
+        raise GrowwError(
+            error_type=ErrorType.VALIDATION_ERROR,
+            message=f"Unknown command: {command}",
+            retryable=False
+        )
+
+    return response_data
+
+
+def handle_request(request):
+    """
+    Processes one decoded request and returns the response envelope.
+    Never raises; failures are reported as {"ok": False, "error": {...}}.
+    """
+    command = None
+    req_id = "cli-direct"
     try:
-        # Read entire stdin buffer
-        input_str = sys.stdin.read()
-        if not input_str:
-            print(json.dumps({"ok": False, "error": {"type": "VALIDATION_ERROR", "safeMessage": "No input"}}))
-            return
+        if not isinstance(request, dict):
+            raise GrowwError(ErrorType.VALIDATION_ERROR, "Request must be a JSON object", retryable=False)
 
-        request = json.loads(input_str)
         command = request.get("command") or request.get("operation") # Support both
-        payload = request.get("payload", {})
+        payload = request.get("payload") or {}
         req_id = request.get("requestId", "cli-direct")
-        
+
         logger.info(f"Received command: {command} [{req_id}]")
 
-        response_data = {}
-        
-        # --- COMMAND DISPATCH ---
-        
-        if command == "AUTH_DIAGNOSE":
-            from .health import diagnose_auth
-            response_data = diagnose_auth()
-
-        elif command == "user_profile":
-            from .auth import AuthManager
-            response_data = AuthManager.get_user_profile_data()
-            
-        elif command == "ltp_batch":
-            from .market_data import get_ltp
-            symbols = payload.get("exchangeTradingSymbols", payload.get("symbols", []))
-            segment = payload.get("segment", "CASH")
-        elif command == "smart_ltp":
-            from .market_data import get_smart_ltp
-            # Payload 'items' might be list of strings or objects
-            items = payload.get("items", payload.get("symbols", []))
-            response_data = get_smart_ltp(items)
-            
-        elif command == "ohlc_batch":
-            from .market_data import get_ohlc
-            symbols = payload.get("exchangeTradingSymbols", payload.get("symbols", []))
-            segment = payload.get("segment", "CASH")
-            response_data = get_ohlc(symbols, segment)
-            
-        elif command == "quote":
-            from .market_data import get_quote
-            response_data = get_quote(
-                payload.get("tradingSymbol"),
-                payload.get("exchange", "NSE"),
-                payload.get("segment", "CASH")
-            )
-            
-        elif command == "historical_daily":
-            from .market_data import get_historical_candles
-            response_data = get_historical_candles(
-                payload.get("tradingSymbol"),
-                payload.get("start"),
-                payload.get("end"),
-                payload.get("exchange", "NSE"),
-                payload.get("segment", "CASH"),
-                payload.get("intervalMinutes", 1440)
-            )
-            
-        elif command == "holdings":
-            from .portfolio import get_holdings
-            response_data = get_holdings()
-            
-        elif command == "positions":
-            from .portfolio import get_positions
-            segment = payload.get("segment")
-            response_data = get_positions(segment)
-            
-        elif command == "search_instrument":
-            from .instruments import search_instrument
-            result = search_instrument(
-                payload.get("query"),
-                payload.get("exchange", "NSE"),
-                payload.get("segment", "CASH")
-            )
-            response_data = {"result": result}
-            
-        elif command == "get_instrument":
-            from .instruments import get_instrument_by_groww_symbol
-            result = get_instrument_by_groww_symbol(payload.get("growwSymbol"))
-            response_data = {"result": result}
-            
-        elif command == "get_all_instruments":
-            from .instruments import get_all_instruments
-            response_data = get_all_instruments()
-            
-        else:
-            raise GrowwError(
-                error_type="VALIDATION_ERROR", # String literal handled by catch-all? No, strictly use Enum in python
-                message=f"Unknown command: {command}",
-                retryable=False
-            )
+        started = time.time()
+        response_data = dispatch(command, payload)
 
         # Success Envelope
         final_response = {
@@ -123,53 +243,316 @@ def main():
             "items": response_data.get("items"), # Backwards compat
             "holdings": response_data.get("holdings"), # Backwards compat
             "candles": response_data.get("candles"), # Backwards compat
-            "meta": {
-                "tsMs": 0, # TODO: real timestamp
-            }
         }
         # Merge dicts to support legacy fields at root if needed by old Node connector
         # But new Node connector should look at 'data' or specific fields.
         # We will keep root fields for safety with existing code.
         final_response.update(response_data)
-        
-        print(json.dumps(final_response))
+        final_response["meta"] = {
+            **(response_data.get("meta") or {}),
+            "tsMs": int(time.time() * 1000),
+            "durationMs": round((time.time() - started) * 1000, 2),
+        }
+        return final_response
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON input: {str(e)}")
-        print(json.dumps({
-            "ok": False,
-            "error": {
-                "type": "VALIDATION_ERROR",
-                "safeMessage": f"Invalid JSON: {str(e)}",
-                "retryable": False
-            }
-        }))
-        sys.exit(1)
-        
     except GrowwError as e:
         logger.error(f"Groww Error: {e.message}")
-        print(json.dumps({
+        return {
             "ok": False,
-            "requestId": req_id if 'req_id' in locals() else "unknown",
-            "operation": command if 'command' in locals() else "unknown",
+            "requestId": req_id,
+            "operation": command or "unknown",
             "error": e.to_dict()
-        }))
-        sys.exit(1)
-        
+        }
+
     except Exception as e:
         logger.error(f"CLI Root Error: {str(e)}")
-        print(json.dumps({
+        return {
             "ok": False,
-            "requestId": req_id if 'req_id' in locals() else "unknown",
-            "operation": command if 'command' in locals() else "unknown",
+            "requestId": req_id,
+            "operation": command or "unknown",
             "error": {
                 "type": "UNKNOWN",
                 "safeMessage": str(e),
                 "retryable": False,
                 "debugHints": ["Check CLI logs"]
             }
+        }
+
+
+def _invalid_json_response(err):
+    logger.error(f"Invalid JSON input: {str(err)}")
+    return {
+        "ok": False,
+        "requestId": "unknown",
+        "operation": "unknown",
+        "error": {
+            "type": "VALIDATION_ERROR",
+            "safeMessage": f"Invalid JSON: {str(err)}",
+            "retryable": False
+        }
+    }
+
+
+# Per-command in-flight limits for serve mode. Commands not listed share only
+# the global worker bound. Override with e.g.
+# GROWW_CLI_COMMAND_LIMITS="historical_daily=1,smart_ltp=6".
+DEFAULT_COMMAND_LIMITS = {
+    "historical_daily": 2,
+    "get_all_instruments": 1,
+    "sync_instruments": 1,
+    "search_instrument": 2,
+    "resolve_instruments": 2,
+    "covariance": 2,
+    "monte_carlo": 1,
+    "holdings": 2,
+    "positions": 2,
+    "AUTH_DIAGNOSE": 1,
+}
+
+
+def _load_command_limits():
+    limits = dict(DEFAULT_COMMAND_LIMITS)
+    raw = os.getenv("GROWW_CLI_COMMAND_LIMITS", "")
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid command limit: {part}")
+    return limits
+
+
+class Dispatcher:
+    """
+    Runs requests on a bounded worker pool and delivers each response through
+    the caller's reply callback as soon as it is ready, so responses may be
+    written out of order (clients match them by requestId).
+
+    A command at its in-flight limit is parked in a per-command queue instead
+    of occupying a worker, so a burst of slow calls (e.g. historical_daily)
+    cannot starve fast ones (e.g. smart_ltp).
+    """
+
+    def __init__(self, max_workers=None, command_limits=None, handler=None):
+        import concurrent.futures
+        self.max_workers = max_workers or int(os.getenv("GROWW_CLI_MAX_WORKERS", 8))
+        self.command_limits = command_limits if command_limits is not None else _load_command_limits()
+        self._handler = handler or handle_request
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="groww-cli"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = {}   # command -> running count
+        self._parked = {}      # command -> deque of (request, reply, future)
+
+    def submit(self, request, reply):
+        """
+        Schedules one decoded request. `reply(response)` is called from a worker
+        thread with the envelope. Returns a Future resolved after the reply.
+        """
+        import collections
+        import concurrent.futures
+        done = concurrent.futures.Future()
+        command = (request.get("command") or request.get("operation")) if isinstance(request, dict) else None
+        limit = self.command_limits.get(command)
+
+        with self._lock:
+            running = self._in_flight.get(command, 0)
+            if limit is not None and running >= limit:
+                self._parked.setdefault(command, collections.deque()).append((request, reply, done))
+                return done
+            self._in_flight[command] = running + 1
+
+        self._pool.submit(self._run, command, request, reply, done)
+        return done
+
+    def _run(self, command, request, reply, done):
+        try:
+            response = self._handler(request)
+            try:
+                reply(response)
+            except Exception as e:
+                logger.error(f"Failed to write response: {e}")
+        finally:
+            done.set_result(None)
+            self._release(command)
+
+    def _release(self, command):
+        with self._lock:
+            queue = self._parked.get(command)
+            if queue:
+                # Hand the slot straight to the next parked request of this command
+                nxt = queue.popleft()
+            else:
+                nxt = None
+                self._in_flight[command] = self._in_flight.get(command, 1) - 1
+        if nxt:
+            self._pool.submit(self._run, command, *nxt)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def serve(stream_in=None, stream_out=None, dispatcher=None):
+    """
+    Long-lived NDJSON loop: one request per input line, one response per output line.
+    Requests run concurrently on the dispatcher; responses are written as they
+    complete. Returns when the input stream is closed and all requests finished.
+    """
+    import concurrent.futures
+    stream_in = stream_in or sys.stdin
+    stream_out = stream_out or sys.stdout
+    owns_dispatcher = dispatcher is None
+    dispatcher = dispatcher or Dispatcher()
+    write_lock = threading.Lock()
+    pending = set()
+
+    def reply(response):
+        line = json.dumps(response) + "\n"
+        with write_lock:
+            stream_out.write(line)
+            stream_out.flush()
+
+    try:
+        for line in stream_in:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply(_invalid_json_response(e))
+                continue
+            fut = dispatcher.submit(request, reply)
+            pending.add(fut)
+            fut.add_done_callback(pending.discard)
+
+        concurrent.futures.wait(list(pending))
+    finally:
+        if owns_dispatcher:
+            dispatcher.shutdown()
+
+
+def serve_socket(path, dispatcher=None):
+    """
+    Serves the NDJSON protocol on a Unix domain socket.
+    Each connection is read on its own thread and may pipeline requests;
+    all connections share one dispatcher, so the worker bounds are global.
+    """
+    import socketserver
+    dispatcher = dispatcher or Dispatcher()
+
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = (raw.decode("utf-8") for raw in self.rfile)
+            writer = _SocketWriter(self.wfile)
+            serve(reader, writer, dispatcher)
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    with socketserver.ThreadingUnixStreamServer(path, _Handler) as server:
+        logger.info(f"Serving on unix socket {path}")
+        try:
+            server.serve_forever()
+        finally:
+            dispatcher.shutdown(wait=False)
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def warm_up():
+    """
+    Pre-loads the expensive process-wide state (SDK client, instrument cache,
+    resolution indices) so the first real request does not pay for it.
+    Failures are logged, not fatal: commands will retry lazily.
+    """
+    try:
+        AuthManager.get_client()
+    except Exception as e:
+        logger.warning(f"Warm-up: Groww client unavailable: {e}")
+        return
+
+    try:
+        from .resolution_engine import engine as resolution_engine
+        resolution_engine.initialize()
+    except Exception as e:
+        logger.warning(f"Warm-up: ResolutionEngine initialization failed: {e}")
+
+
+class _SocketWriter:
+    """Minimal text-stream adapter over a socket's binary write file."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text):
+        self._wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def run_once():
+    """Legacy single-shot mode: one JSON request on stdin, one response on stdout."""
+    # Read entire stdin buffer
+    input_str = sys.stdin.read()
+    if not input_str:
+        print(json.dumps({"ok": False, "error": {"type": "VALIDATION_ERROR", "safeMessage": "No input"}}))
+        return
+
+    try:
+        request = json.loads(input_str)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON input: {str(e)}")
+        print(json.dumps({
+            "ok": False,
+            "error": {
+                "type": "VALIDATION_ERROR",
+                "safeMessage": f"Invalid JSON: {str(e)}",
+                "retryable": False
+            }
         }))
         sys.exit(1)
 
+    response = handle_request(request)
+    print(json.dumps(response))
+    if not response.get("ok"):
+        sys.exit(1)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if "--serve" not in argv:
+        run_once()
+        return
+
+    socket_path = None
+    if "--socket" in argv:
+        idx = argv.index("--socket")
+        if idx + 1 >= len(argv):
+            print("--socket requires a path", file=sys.stderr)
+            sys.exit(2)
+        socket_path = argv[idx + 1]
+
+    # stdout is the protocol stream. The SDK prints banners ("Ready to Groww!", changelog)
+    # whenever a client is built, possibly on a worker thread mid-reply, so everything
+    # else printed to stdout goes to stderr; replies use the private handle.
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    logger.info("Starting Groww CLI in serve mode")
+    if "--no-warmup" not in argv:
+        warm_up()
+
+    if socket_path:
+        serve_socket(socket_path)
+    else:
+        serve(stream_out=protocol_out)
+    logger.info("Serve loop finished, exiting")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,205 @@
+"""
+Cross-asset covariance / correlation from the daily candles in the candle store.
+
+The universe's closes are aligned on one date axis, turned into a (T x N) log-return
+matrix over the last `window` sessions, and estimated with NumPy:
+  - "sample": equally weighted covariance,
+  - "ewma":   exponentially weighted (RiskMetrics lambda, default 0.94).
+Both can be shrunk toward a scaled identity with the Ledoit-Wolf intensity, which is
+large for short histories (T close to or below N) and fades as T grows.
+
+Estimates are memoized per (universe, window, as-of, method, shrinkage) together with
+each series' store signature, so new candles for any member invalidate the entry.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+from .candle_store import candle_store
+from .cache import build_memo_cache
+from .errors import GrowwError, ErrorType
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+TRADING_DAYS = 252
+EWMA_LAMBDA = 0.94
+MAX_FILL_DAYS = 5    # suspensions / holidays bridged by carrying the last close forward
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+_memo = build_memo_cache("GROWW_COVARIANCE_CACHE_MAX_ENTRIES", 64)
+
+
+def parse_universe(items):
+    """"NSE_RELIANCE" strings or {"symbol", "exchange", "segment"} dicts -> [(exchange, segment, symbol)]."""
+    out = []
+    for item in items:
+        if isinstance(item, dict):
+            symbol = item.get("symbol") or item.get("tradingSymbol")
+            exchange, sep, rest = str(symbol).partition("_")
+            if "exchange" not in item and sep and exchange in ("NSE", "BSE"):
+                out.append((exchange, item.get("segment", "CASH"), rest))
+            else:
+                out.append((item.get("exchange", "NSE"), item.get("segment", "CASH"), symbol))
+        else:
+            exchange, sep, symbol = str(item).partition("_")
+            out.append((exchange, "CASH", symbol) if sep and exchange in ("NSE", "BSE") else ("NSE", "CASH", str(item)))
+    return out
+
+
+def _as_of_ts(as_of):
+    """End of the as-of day (IST) in epoch seconds; today if None."""
+    if as_of is None:
+        day = datetime.datetime.now(IST).date()
+    elif isinstance(as_of, str):
+        day = datetime.date.fromisoformat(as_of[:10])
+    else:
+        day = as_of
+    end = datetime.datetime.combine(day, datetime.time(23, 59, 59), tzinfo=IST)
+    return day.isoformat(), int(end.timestamp())
+
+
+def returns_matrix(universe, window, as_of_ts, store=None):
+    """
+    (symbols, dates, R, excluded) with R the (T x N) daily log returns of the last
+    `window` sessions up to as_of_ts. Symbols without a full window of history are
+    left out of R and listed in `excluded`.
+    """
+    store = store or candle_store
+    closes, excluded = {}, []
+    for exchange, segment, symbol in universe:
+        cols = store.read(exchange, segment, symbol, 1440, None, as_of_ts)
+        if len(cols["ts"]) < 2:
+            excluded.append(f"{exchange}_{symbol}")
+            continue
+        closes[f"{exchange}_{symbol}"] = pd.Series(cols["close"], index=cols["ts"])
+    if not closes:
+        return [], [], np.empty((0, 0)), excluded
+
+    panel = pd.concat(closes, axis=1).sort_index().ffill(limit=MAX_FILL_DAYS)
+    panel = panel.iloc[-(window + 1):]
+    # A series must cover the whole window; otherwise it would shorten everyone's sample
+    complete = panel.notna().all(axis=0)
+    excluded += [s for s in panel.columns[~complete]]
+    panel = panel.loc[:, complete]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(panel.to_numpy(dtype=np.float64)), axis=0)
+    return list(panel.columns), panel.index[1:].tolist(), log_returns, excluded
+
+
+def _ewma_weights(t, lam):
+    w = lam ** np.arange(t - 1, -1, -1, dtype=np.float64)
+    return w / w.sum()
+
+
+def ledoit_wolf_intensity(returns, weights=None):
+    """
+    Ledoit-Wolf (2004) optimal shrinkage intensity toward mu * I for the (weighted)
+    covariance of `returns` (T x N).
+    """
+    t, n = returns.shape
+    if t < 2 or n < 2:
+        return 0.0
+    if weights is None:
+        weights = np.full(t, 1.0 / t)
+    centered = returns - weights @ returns
+    cov = (centered * weights[:, None]).T @ centered
+    mu = np.trace(cov) / n
+    d2 = np.sum((cov - mu * np.eye(n)) ** 2)
+    if d2 <= 0:
+        return 0.0
+    # Variance of the covariance estimator: sum_t w_t^2 * ||x_t x_t' - S||_F^2, expanded so
+    # no (T x N x N) tensor is formed
+    norms = np.sum(centered ** 2, axis=1)
+    quad = np.sum((centered @ cov) * centered, axis=1)
+    b2 = np.sum(weights ** 2 * (norms ** 2 - 2 * quad + np.sum(cov ** 2)))
+    return float(min(max(b2 / d2, 0.0), 1.0))
+
+
+def _correlation(cov):
+    std = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+    corr[~np.isfinite(corr)] = 0.0
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def estimate(items, window=TRADING_DAYS, as_of=None, method="sample", ewma_lambda=EWMA_LAMBDA,
+             shrinkage="auto", store=None):
+    """
+    Covariance / correlation of daily log returns for a universe.
+
+    shrinkage: "auto" (Ledoit-Wolf intensity), a fixed intensity in [0, 1], or None.
+    Returns {"symbols", "asOf", "observations", "excluded", "mean", "covariance",
+    "correlation", "shrinkage", "method"} with NumPy arrays (daily units).
+    """
+    if method not in ("sample", "ewma"):
+        raise GrowwError(ErrorType.VALIDATION_ERROR, f"Unknown covariance method: {method}")
+    window = int(window)
+    if window < 2:
+        raise GrowwError(ErrorType.VALIDATION_ERROR, "window must be at least 2 sessions")
+    store = store or candle_store
+    universe = parse_universe(items)
+    as_of_date, as_of_ts = _as_of_ts(as_of)
+
+    # Store signatures change on every append / compaction, invalidating stale entries
+    signatures = tuple(store.signature(e, s, sym, 1440) for e, s, sym in universe)
+    key = (tuple(universe), window, as_of_date, method, ewma_lambda, shrinkage, signatures)
+    cached = _memo.get("memo", key)
+    if cached is not None:
+        return cached[0]
+
+    symbols, dates, returns, excluded = returns_matrix(universe, window, as_of_ts, store)
+    t, n = returns.shape
+    if t < 2 or n == 0:
+        raise GrowwError(ErrorType.VALIDATION_ERROR,
+                         f"Not enough stored daily history to estimate covariance (have {t} returns)")
+
+    weights = _ewma_weights(t, ewma_lambda) if method == "ewma" else np.full(t, 1.0 / t)
+    mean = weights @ returns
+    centered = returns - mean
+    cov = (centered * weights[:, None]).T @ centered
+    if method == "sample":
+        cov *= t / (t - 1)   # unbiased
+
+    if shrinkage == "auto":
+        intensity = ledoit_wolf_intensity(returns, weights)
+    else:
+        intensity = float(shrinkage or 0.0)
+    if intensity > 0:
+        target = np.trace(cov) / n * np.eye(n)
+        cov = intensity * target + (1 - intensity) * cov
+
+    result = {
+        "symbols": symbols,
+        "asOf": as_of_date,
+        "method": method,
+        "observations": t,
+        "excluded": excluded,
+        "mean": mean,
+        "covariance": cov,
+        "correlation": _correlation(cov),
+        "shrinkage": round(intensity, 6),
+    }
+    # Reading may have compacted a series (new signature); key the entry on the post-read state
+    signatures = tuple(store.signature(e, s, sym, 1440) for e, s, sym in universe)
+    _memo.put("memo", key[:-1] + (signatures,), result)
+    return result
+
+
+def to_payload(result, annualize=True):
+    """JSON-safe form of an estimate() result (optionally annualized)."""
+    scale = TRADING_DAYS if annualize else 1
+    cov = result["covariance"] * scale
+    return {
+        "symbols": result["symbols"],
+        "asOf": result["asOf"],
+        "method": result["method"],
+        "observations": result["observations"],
+        "excluded": result["excluded"],
+        "shrinkage": result["shrinkage"],
+        "annualized": annualize,
+        "volatilityPct": (np.sqrt(np.diag(cov)) * 100).round(4).tolist(),
+        "covariance": cov.tolist(),
+        "correlation": result["correlation"].round(6).tolist(),
+    }
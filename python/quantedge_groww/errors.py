@@ -27,3 +27,42 @@ class GrowwError(Exception):
             "debugHints": self.debug_hints,
             "upstreamStatus": self.upstream_status
         }
+
+
+def classify_exception(exc):
+    """
+    Maps an arbitrary exception (GrowwError, growwapi SDK exception, network error)
+    onto the ErrorType taxonomy.
+    """
+    if isinstance(exc, GrowwError):
+        return exc.error_type
+
+    name = type(exc).__name__
+    msg = str(exc).lower()
+    if name == "GrowwAPIRateLimitException" or "429" in msg or "rate limit" in msg or "too many requests" in msg:
+        return ErrorType.RATE_LIMITED
+    if isinstance(exc, TimeoutError) or "Timeout" in name or "timed out" in msg or "timeout" in msg:
+        return ErrorType.TIMEOUT
+    if name == "GrowwAPIAuthenticationException":
+        return ErrorType.AUTHENTICATION_FAILED
+    if name == "GrowwAPIAuthorisationException" or "access forbidden" in msg:
+        return ErrorType.PERMISSION_DENIED
+    if name in ("GrowwAPIBadRequestException", "GrowwAPINotFoundException", "InstrumentNotFoundException"):
+        return ErrorType.VALIDATION_ERROR
+    status = _status_code(exc)
+    if status in (400, 404):
+        return ErrorType.VALIDATION_ERROR
+    if (status is not None and status >= 500) or isinstance(exc, ConnectionError) or "ConnectionError" in name:
+        return ErrorType.UPSTREAM_UNAVAILABLE
+    return ErrorType.UNKNOWN
+
+
+def _status_code(exc):
+    """HTTP status of an SDK exception (GrowwAPIException.code) or requests HTTPError, if numeric."""
+    code = getattr(exc, "code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,63 @@
+"""
+Forward returns after dated events, for many price series at once.
+
+All series are concatenated into one sorted key array (series id, then date), so the
+price on or after every (event + window) for every series is a single searchsorted
+call instead of a DataFrame mask per event, window and series.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _seconds(values):
+    return pd.DatetimeIndex(values).values.astype("datetime64[s]").astype(np.int64)
+
+
+class EventStudy:
+    """
+    series: {name: DataFrame with 'date' and 'close'} (e.g. the market_trends loaders),
+    each sorted by date.
+    """
+
+    def __init__(self, series):
+        self.names = list(series)
+        dates = [_seconds(series[n]["date"]) for n in self.names]
+        self.closes = np.concatenate([np.asarray(series[n]["close"], dtype=np.float64) for n in self.names]) \
+            if self.names else np.array([], dtype=np.float64)
+        lengths = np.array([len(d) for d in dates], dtype=np.int64)
+        self.ends = np.cumsum(lengths)
+        self._dates = np.concatenate(dates) if dates else np.array([], dtype=np.int64)
+
+    def forward_returns(self, event_dates, windows):
+        """
+        (events, len(windows), series) array of % returns from the first close on or after
+        each event date to the first close on or after event date + window days.
+        NaN where a series has no price on/after either date.
+        """
+        events = _seconds(event_dates)
+        offsets = np.concatenate(([0], np.asarray(windows, dtype=np.int64) * 86400))
+        n_series = len(self.names)
+        if not len(events) or not n_series:
+            return np.full((len(events), len(windows), n_series), np.nan)
+
+        # targets[e, w, s]: date whose price we need (w == 0 is the event itself)
+        targets = events[:, None, None] + offsets[None, :, None] + np.zeros((1, 1, n_series), dtype=np.int64)
+        base = min(int(self._dates.min()) if len(self._dates) else 0, int(targets.min()))
+        span = max(int(self._dates.max()) if len(self._dates) else 0, int(targets.max())) - base + 1
+        series_id = np.repeat(np.arange(n_series, dtype=np.int64), np.diff(np.r_[0, self.ends]))
+        keys = series_id * span + (self._dates - base)
+
+        sid = np.arange(n_series, dtype=np.int64)[None, None, :]
+        pos = np.searchsorted(keys, sid * span + (targets - base), side="left")
+        found = pos < self.ends[sid]
+        prices = np.where(found, self.closes[np.minimum(pos, len(self.closes) - 1)], np.nan)
+
+        start = prices[:, :1, :]
+        return (prices[:, 1:, :] - start) / start * 100
+
+    def table(self, event_dates, windows, event_labels=None):
+        """Tidy matrix: rows (event, window days), one column per series."""
+        returns = self.forward_returns(event_dates, windows)
+        labels = list(event_labels) if event_labels is not None else list(range(len(returns)))
+        index = pd.MultiIndex.from_product([labels, list(windows)], names=["event", "window"])
+        return pd.DataFrame(returns.reshape(-1, len(self.names)), index=index, columns=self.names)
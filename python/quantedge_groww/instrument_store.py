@@ -0,0 +1,319 @@
+"""
+Columnar on-disk instrument master.
+
+Layout (under GROWW_CACHE_DIR, default the system temp dir):
+
+    groww_instrument_master/
+        manifest.json          -> {"version", "createdAt", "rows", "columns", "formatVersion"}
+        v<version>/<column>.npy
+
+Each column is a plain .npy array (fixed-width unicode for text, native dtype for numbers),
+so loading is a handful of np.load(mmap_mode='r') calls: no unpickling, no per-row Python
+objects, and column access is zero-copy. The version is a content hash, so an unchanged
+instrument dump keeps its version (and everything keyed on it).
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+FORMAT_VERSION = 1
+CACHE_DIR = os.getenv("GROWW_CACHE_DIR", tempfile.gettempdir())
+STORE_DIR = os.path.join(CACHE_DIR, "groww_instrument_master")
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 2
+
+
+class InstrumentMaster:
+    """
+    Read-only view over one stored version of the instrument master.
+    Columns are memory-mapped on first access and shared by all callers.
+    """
+
+    def __init__(self, root, manifest):
+        self.root = root
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.rows = manifest["rows"]
+        self.created_at = manifest["createdAt"]
+        self.columns = list(manifest["columns"])
+        self._cache = {}
+
+    @property
+    def path(self):
+        return os.path.join(self.root, f"v{self.version}")
+
+    @property
+    def age_s(self):
+        return time.time() - self.created_at
+
+    def has_column(self, name):
+        return name in self.manifest["columns"]
+
+    def column(self, name):
+        """Zero-copy (memory-mapped) column array."""
+        arr = self._cache.get(name)
+        if arr is None:
+            arr = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+            self._cache[name] = arr
+        return arr
+
+    def to_frame(self, columns=None, rows=None):
+        """Materialises a pandas DataFrame (a copy) for the given columns / row positions."""
+        import pandas as pd
+        cols = [c for c in (columns or self.columns) if self.has_column(c)]
+        data = {}
+        for c in cols:
+            arr = self.column(c)
+            data[c] = arr[rows] if rows is not None else np.asarray(arr)
+        return pd.DataFrame(data)
+
+    def record(self, row):
+        """One instrument as a dict with the SDK's snake_case keys (empty text -> None)."""
+        out = {}
+        for c in self.columns:
+            v = self.column(c)[row]
+            v = v.item() if hasattr(v, "item") else v
+            out[c] = None if v == "" else v
+        return out
+
+    def to_records(self, rows=None):
+        """Instruments as a list of dicts. Only built on demand (e.g. get_all_instruments)."""
+        df = self.to_frame(rows=rows)
+        text_cols = [c for c in self.columns if self.column(c).dtype.kind == "U"]
+        if text_cols:
+            df[text_cols] = df[text_cols].astype(object).where(df[text_cols] != "", None)
+        return df.to_dict(orient="records")
+
+
+def _column_array(series):
+    if series.dtype.kind in "biuf":
+        return series.to_numpy()
+    values = series.astype(object).where(series.notna(), "")
+    return np.asarray(values.astype(str).to_numpy(), dtype=str)
+
+
+def _read_manifest(root=STORE_DIR):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("formatVersion") != FORMAT_VERSION:
+        return None
+    if not os.path.isdir(os.path.join(root, f"v{manifest['version']}")):
+        return None
+    return manifest
+
+
+def load_master(root=STORE_DIR):
+    """Returns the current InstrumentMaster, or None if nothing valid is stored."""
+    try:
+        manifest = _read_manifest(root)
+    except Exception as e:
+        logger.warning(f"Failed to read instrument master manifest: {e}")
+        return None
+    if manifest is None:
+        return None
+    return InstrumentMaster(root, manifest)
+
+
+def save_master(df, root=STORE_DIR):
+    """
+    Writes a DataFrame as a new master version and makes it current.
+    If the content hash matches the current version, only the timestamp is refreshed.
+    """
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    arrays = {str(c): _column_array(df[c]) for c in df.columns}
+
+    digest = hashlib.sha1()
+    for name in sorted(arrays):
+        digest.update(name.encode("utf-8"))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    version = digest.hexdigest()[:16]
+
+    os.makedirs(root, exist_ok=True)
+    manifest = {
+        "formatVersion": FORMAT_VERSION,
+        "version": version,
+        "createdAt": time.time(),
+        "rows": int(len(df)),
+        "columns": {name: arr.dtype.str for name, arr in arrays.items()},
+    }
+
+    target = os.path.join(root, f"v{version}")
+    if not os.path.isdir(target):
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+        for name, arr in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), arr, allow_pickle=False)
+        os.replace(staging, target)
+
+    _write_manifest(root, manifest)
+    _prune_versions(root, keep={version})
+    logger.info(f"Instrument master saved: version {version}, {manifest['rows']} rows")
+    return InstrumentMaster(root, manifest)
+
+
+def _write_manifest(root, manifest):
+    tmp = os.path.join(root, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(root, MANIFEST_FILE))
+
+
+def _prune_versions(root, keep):
+    """Removes all but the newest KEEP_VERSIONS version directories (never ones in `keep`)."""
+    try:
+        dirs = [d for d in os.listdir(root) if d.startswith("v") and os.path.isdir(os.path.join(root, d))]
+        dirs.sort(key=lambda d: os.path.getmtime(os.path.join(root, d)), reverse=True)
+        for d in dirs[KEEP_VERSIONS:]:
+            if d[1:] not in keep:
+                shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+    except Exception as e:
+        logger.warning(f"Failed to prune old instrument master versions: {e}")
+
+
+# --- Derived per-version arrays ----------------------------------------------
+
+def save_derived(master, name, arrays):
+    """
+    Stores arrays computed from a master version (indices etc.) under
+    v<version>/<name>/, published atomically. Losing a race to another
+    process is fine: both wrote the same content.
+    """
+    target = os.path.join(master.path, name)
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=master.path)
+    try:
+        for key, arr in arrays.items():
+            np.save(os.path.join(staging, f"{key}.npy"), arr, allow_pickle=False)
+        os.replace(staging, target)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_derived(master, name, keys):
+    """Memory-maps arrays saved with save_derived, or returns None if absent."""
+    path = os.path.join(master.path, name)
+    if not os.path.isdir(path):
+        return None
+    return {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r", allow_pickle=False)
+            for key in keys}
+
+
+# --- Incremental sync -------------------------------------------------------
+
+CHANGELOG_FILE = "changelog.jsonl"
+# Above this share of churned rows, consumers should rebuild instead of patching
+FULL_REBUILD_RATIO = 0.2
+
+
+def instrument_keys(master):
+    """
+    Stable identity per row: groww_symbol when present, else "EXCHANGE:exchange_token".
+    Computed vectorised once per master and cached on it.
+    """
+    keys = master._cache.get("__keys__")
+    if keys is None:
+        groww = np.asarray(master.column("groww_symbol")) if master.has_column("groww_symbol") \
+            else np.full(master.rows, "", dtype=str)
+        fallback = np.char.add(np.char.add(np.asarray(master.column("exchange")).astype(str), ":"),
+                               np.asarray(master.column("exchange_token")).astype(str))
+        keys = np.where(groww != "", groww, fallback)
+        master._cache["__keys__"] = keys
+    return keys
+
+
+def _missing(values):
+    """NaN mask (string columns store missing cells as "", which already compare equal)."""
+    if values.dtype.kind in "fc":
+        return np.isnan(values)
+    return np.zeros(values.shape, dtype=bool)
+
+
+def diff_masters(old, new):
+    """
+    Compares two stored versions by instrument key.
+    Returns {"added": [...], "removed": [...], "changed": [...]} (lists of keys).
+    """
+    old_keys = instrument_keys(old)
+    new_keys = instrument_keys(new)
+
+    _, old_pos, new_pos = np.intersect1d(old_keys, new_keys, assume_unique=False, return_indices=True)
+    added = np.setdiff1d(new_keys, old_keys)
+    removed = np.setdiff1d(old_keys, new_keys)
+
+    changed_mask = np.zeros(len(old_pos), dtype=bool)
+    for c in set(old.columns) | set(new.columns):
+        if not (old.has_column(c) and new.has_column(c)):
+            # Schema change: every common row is different
+            changed_mask[:] = True
+            break
+        a = np.asarray(old.column(c))[old_pos]
+        b = np.asarray(new.column(c))[new_pos]
+        # NaN != NaN, so missing-in-both cells must not count as changes
+        changed_mask |= ~((a == b) | (_missing(a) & _missing(b)))
+    changed = old_keys[old_pos[changed_mask]]
+
+    return {
+        "added": added.tolist(),
+        "removed": removed.tolist(),
+        "changed": changed.tolist(),
+    }
+
+
+def sync_master(df, root=STORE_DIR):
+    """
+    Stores a fresh dump and records how it differs from the previous version.
+
+    Returns (master, change_entry). change_entry is None when nothing was stored
+    before or the content is unchanged (the current version is then only marked fresh).
+    """
+    previous = load_master(root)
+    master = save_master(df, root)
+    if previous is None or previous.version == master.version:
+        return master, None
+
+    diff = diff_masters(previous, master)
+    churn = len(diff["added"]) + len(diff["removed"]) + len(diff["changed"])
+    entry = {
+        "ts": time.time(),
+        "fromVersion": previous.version,
+        "toVersion": master.version,
+        "counts": {k: len(v) for k, v in diff.items()},
+        "fullRebuild": churn > FULL_REBUILD_RATIO * max(previous.rows, 1),
+    }
+    if not entry["fullRebuild"]:
+        entry.update(diff)
+
+    try:
+        with open(os.path.join(root, CHANGELOG_FILE), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        logger.warning(f"Failed to append instrument changelog: {e}")
+
+    logger.info(f"Instrument master {previous.version} -> {master.version}: {entry['counts']}")
+    return master, entry
+
+
+def read_change(from_version, to_version, root=STORE_DIR):
+    """Returns the changelog entry for a direct from->to transition, or None."""
+    path = os.path.join(root, CHANGELOG_FILE)
+    if not os.path.exists(path):
+        return None
+    found = None
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if from_version in line and to_version in line:
+                    entry = json.loads(line)
+                    if entry.get("fromVersion") == from_version and entry.get("toVersion") == to_version:
+                        found = entry
+    except Exception as e:
+        logger.warning(f"Failed to read instrument changelog: {e}")
+    return found
@@ -0,0 +1,111 @@
+"""
+Per-(exchange, segment) views of the instrument master.
+
+Rows are grouped by partition ("NSE|CASH", "BSE|FNO", ...) and, within each
+partition, sorted by upper-cased trading symbol. That gives:
+  - row filters for an exchange / segment without scanning the master, and
+  - exact trading-symbol lookups by binary search (the local replacement for the
+    SDK's get_instrument_by_exchange_and_trading_symbol, which downloads the CSV).
+
+Stored per master version under v<version>/partitions/.
+"""
+import threading
+import numpy as np
+from . import instrument_store
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+INDEX_DIR = "partitions"
+ANY = (None, "", "ALL", "*")
+
+
+def build_arrays(master):
+    exchange = np.asarray(master.column("exchange")).astype(str)
+    segment = np.asarray(master.column("segment")).astype(str)
+    symbols = np.char.upper(np.asarray(master.column("trading_symbol")).astype(str))
+
+    part_keys, row_part = np.unique(np.char.add(np.char.add(exchange, "|"), segment), return_inverse=True)
+    row_part = row_part.astype(np.int32).ravel()
+    order = np.lexsort((symbols, row_part))
+    offsets = np.searchsorted(row_part[order], np.arange(len(part_keys) + 1)).astype(np.int64)
+    return {
+        "keys": part_keys,
+        "offsets": offsets,
+        "rows": order.astype(np.int64),
+        "symbols": symbols[order],
+        "row_part": row_part,
+    }
+
+
+class InstrumentViews:
+    """Partition lookups over one master version (all arrays may be memory-mapped)."""
+
+    def __init__(self, keys, offsets, rows, symbols, row_part):
+        self.keys = [str(k) for k in keys]
+        self.offsets = offsets
+        self.rows = rows
+        self.symbols = symbols
+        self.row_part = row_part
+
+    def partitions(self, exchange=None, segment=None):
+        """Partition ids matching exchange / segment (None or "ALL" matches any)."""
+        out = []
+        for pid, key in enumerate(self.keys):
+            ex, seg = key.split("|", 1)
+            if (exchange in ANY or ex == exchange) and (segment in ANY or seg == segment):
+                out.append(pid)
+        return out
+
+    def mask(self, rows, exchange=None, segment=None):
+        """Boolean mask over `rows` (master positions) for membership in the matching partitions."""
+        if exchange in ANY and segment in ANY:
+            return np.ones(len(rows), dtype=bool)
+        return np.isin(self.row_part[rows], self.partitions(exchange, segment))
+
+    def find_symbol(self, trading_symbol, exchange=None, segment=None):
+        """Master rows whose trading symbol equals `trading_symbol` (case-insensitive)."""
+        if not trading_symbol:
+            return np.array([], dtype=np.int64)
+        wanted = trading_symbol.upper()
+        found = []
+        for p in self.partitions(exchange, segment):
+            lo, hi = int(self.offsets[p]), int(self.offsets[p + 1])
+            part = self.symbols[lo:hi]
+            a = int(np.searchsorted(part, wanted, side="left"))
+            b = int(np.searchsorted(part, wanted, side="right"))
+            if a < b:
+                found.append(self.rows[lo + a:lo + b])
+        return np.concatenate(found) if found else np.array([], dtype=np.int64)
+
+
+_views = {}
+_lock = threading.Lock()
+
+
+def get_views(master):
+    """InstrumentViews for a master version: memory-mapped if stored, else built and saved once."""
+    with _lock:
+        views = _views.get(master.version)
+        if views is not None:
+            return views
+
+        names = ("keys", "offsets", "rows", "symbols", "row_part")
+        arrays = None
+        try:
+            arrays = instrument_store.load_derived(master, INDEX_DIR, names)
+        except Exception as e:
+            logger.warning(f"InstrumentViews: stored partitions unreadable ({e}); rebuilding")
+        if arrays is None:
+            logger.info(f"InstrumentViews: partitioning master {master.version}")
+            arrays = build_arrays(master)
+            try:
+                instrument_store.save_derived(master, INDEX_DIR, arrays)
+            except Exception as e:
+                logger.warning(f"InstrumentViews: could not persist partitions ({e})")
+
+        views = InstrumentViews(*(arrays[n] for n in names))
+        while len(_views) >= 2:
+            _views.pop(next(iter(_views)))
+        _views[master.version] = views
+        return views
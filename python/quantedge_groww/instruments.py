@@ -6,9 +6,16 @@ from .auth import get_groww_client
 from .retry import exponential_backoff
 from .errors import GrowwError, ErrorType
 from .logging_config import setup_logging
+from . import instrument_store
+from . import ngram_index
+from . import instrument_views
+import threading
 
 logger = setup_logging()
 
+# Columns needed to score and return search results
+SEARCH_COLUMNS = ["exchange", "segment", "trading_symbol", "groww_symbol", "name"]
+
 @exponential_backoff()
 def get_instrument_by_groww_symbol(groww_symbol):
     """
@@ -45,6 +52,20 @@ def get_instrument_by_groww_symbol(groww_symbol):
         raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"Instrument lookup failed: {str(e)}")
 
 
+def _instrument_summary(instrument):
+    """camelCase summary of an SDK / master instrument dict (snake_case keys)."""
+    return {
+        "exchange": instrument.get("exchange"),
+        "segment": instrument.get("segment"),
+        "tradingSymbol": instrument.get("trading_symbol"),
+        "growwSymbol": instrument.get("groww_symbol"),
+        "name": instrument.get("name"),
+        "isin": instrument.get("isin"),
+        "exchangeToken": instrument.get("exchange_token"),
+        "lotSize": instrument.get("lot_size")
+    }
+
+
 @exponential_backoff()
 def get_instrument_by_trading_symbol(trading_symbol, exchange="NSE"):
     """
@@ -61,16 +82,7 @@ def get_instrument_by_trading_symbol(trading_symbol, exchange="NSE"):
         )
         
         if instrument:
-            return {
-                "exchange": instrument.get("exchange"),
-                "segment": instrument.get("segment"),
-                "tradingSymbol": instrument.get("trading_symbol"),
-                "growwSymbol": instrument.get("groww_symbol"),
-                "name": instrument.get("name"),
-                "isin": instrument.get("isin"),
-                "exchangeToken": instrument.get("exchange_token"),
-                "lotSize": instrument.get("lot_size")
-            }
+            return _instrument_summary(instrument)
         
         return None
         
@@ -80,68 +92,88 @@ def get_instrument_by_trading_symbol(trading_symbol, exchange="NSE"):
         raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"Instrument lookup failed: {str(e)}")
 
 
-@exponential_backoff()
-def get_all_instruments():
-    """
-    Returns all available instruments as a list.
-    Uses file-based caching (pickle) to avoid repeated API calls.
-    """
-    import os
-    import time
-    import tempfile
-    import pandas as pd
-    
-    CACHE_FILE = os.path.join(tempfile.gettempdir(), 'groww_instruments_cache.pkl')
-    CACHE_TTL = 3600 * 4 # 4 hours
-    
-    try:
-        # Try to load from cache
-        if os.path.exists(CACHE_FILE):
-             mtime = os.path.getmtime(CACHE_FILE)
-             if time.time() - mtime < CACHE_TTL:
-                 try:
-                     logger.info("Loading instruments from cache...")
-                     df = pd.read_pickle(CACHE_FILE)
-                     instruments = df.to_dict(orient="records")
-                     return {"instruments": instruments, "count": len(instruments)}
-                 except Exception as cache_err:
-                     logger.warning(f"Failed to read cache: {cache_err}")
-    
-    except Exception as e:
-        logger.warning(f"Cache check failed: {e}")
+INSTRUMENT_CACHE_TTL = 3600 * 4 # 4 hours
+
 
-    # Fetch from API
+@exponential_backoff()
+def _download_instruments():
+    """Downloads the full instrument dump from the SDK (a pandas DataFrame)."""
     client = get_groww_client()
-    
     try:
         logger.info("Fetching all instruments from API (this may take a moment)...")
-        
-        # Returns a pandas DataFrame
-        df = client.get_all_instruments()
-        
-        # Save to cache
-        try:
-            df.to_pickle(CACHE_FILE)
-            logger.info(f"Saved instruments to cache: {CACHE_FILE}")
-        except Exception as save_err:
-            logger.warning(f"Failed to save cache: {save_err}")
-        
-        # Convert to list of dicts for JSON serialization
-        instruments = df.to_dict(orient="records")
-        
-        logger.info(f"Fetched {len(instruments)} instruments")
-        return {"instruments": instruments, "count": len(instruments)}
-        
+        # The SDK keeps the first dump for the client's lifetime; drop it so a long-lived
+        # serve process downloads a fresh one (its own lookups then use it too)
+        client.instruments = None
+        return client.get_all_instruments()
     except Exception as e:
         if isinstance(e, GrowwError): raise e
         logger.error(f"All instruments fetch failed: {str(e)}")
         raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"Instruments sync failed: {str(e)}")
 
 
+_master_lock = threading.Lock()
+
+
+def get_instrument_master(force_refresh=False):
+    """
+    Returns the columnar InstrumentMaster, syncing a fresh dump when the stored
+    one is older than INSTRUMENT_CACHE_TTL. Falls back to a stale copy if the
+    download fails.
+    """
+    master = instrument_store.load_master()
+    if master is not None and not force_refresh and master.age_s < INSTRUMENT_CACHE_TTL:
+        return master
+    return sync_instruments(force_refresh=force_refresh)["master"]
+
+
+def sync_instruments(force_refresh=False):
+    """
+    Downloads the instrument dump and diffs it against the stored master by
+    groww_symbol / exchange_token. Unchanged dumps only refresh the timestamp;
+    otherwise a new version is stored and a changelog entry is written.
+
+    Returns {"master": InstrumentMaster, "change": changelog entry or None}.
+    """
+    with _master_lock:
+        # Another thread may have synced while we waited for the lock
+        master = instrument_store.load_master()
+        if master is not None and not force_refresh and master.age_s < INSTRUMENT_CACHE_TTL:
+            return {"master": master, "change": None}
+
+        try:
+            df = _download_instruments()
+        except GrowwError:
+            if master is not None:
+                logger.warning(f"Instrument download failed, using stale master (version {master.version})")
+                return {"master": master, "change": None}
+            raise
+
+        try:
+            master, change = instrument_store.sync_master(df)
+        except Exception as save_err:
+            logger.warning(f"Failed to save instrument master: {save_err}")
+            raise GrowwError(ErrorType.UNKNOWN, f"Instrument master could not be stored: {save_err}")
+        return {"master": master, "change": change}
+
+
+def get_all_instruments():
+    """
+    Returns all available instruments as a list.
+    Backed by the columnar instrument master; the list of dicts is only
+    materialised here, for the get_all_instruments CLI command.
+    """
+    master = get_instrument_master()
+    instruments = master.to_records()
+    logger.info(f"Loaded {len(instruments)} instruments (master version {master.version})")
+    return {"instruments": instruments, "count": len(instruments), "version": master.version}
+
+
 def search_instrument(query, exchange="NSE", segment="CASH"):
     """
     Searches for an instrument by partial name/symbol using the full instrument list.
     Simulates a 'Database Search' with Robust Token Overlap Scoring.
+    Only the given exchange / segment is searched (None or "ALL" searches every one);
+    no network call is made once the instrument master is cached.
     """
     if not query or not isinstance(query, str):
         return []
@@ -180,27 +212,32 @@ def search_instrument(query, exchange="NSE", segment="CASH"):
                  query_norm = query_norm[:-len(suffix)].strip()
                  break
     
-    # 1. Try exact symbol lookup first (fast path)
-    if len(query_norm) < 15:
-        try:
-            res = get_instrument_by_trading_symbol(query_norm, exchange)
-            if res:
-                return [res]
-        except:
-            pass
+    # 1. Try exact symbol lookup first (fast path, served from the local partitioned master)
+    try:
+        master = get_instrument_master()
+        views = instrument_views.get_views(master)
+        rows = views.find_symbol(query_norm, exchange, segment)
+        if len(rows):
+            return [_instrument_summary(master.record(int(rows[0])))]
+    except Exception as e:
+        logger.warning(f"Local symbol lookup failed for {query_norm}: {e}")
+        return []
 
     # 2. Database Search
     try:
-        import pandas as pd
-        # Use our wrapper to get cached data
-        # It returns dict with 'instruments' list
-        data = get_all_instruments()
-        if not data or 'instruments' not in data:
+        # Tokenize
+        tokens = [t for t in query_norm.split() if len(t) > 1]
+        
+        # If no tokens (e.g. query was "."), return empty
+        if not tokens: return []
+        
+        # Columnar master (memory-mapped); only trigram-index candidates in the
+        # requested exchange / segment partition are materialised
+        rows = ngram_index.get_index(master).candidates(tokens)
+        rows = rows[views.mask(rows, exchange, segment)]
+        df = master.to_frame(SEARCH_COLUMNS, rows=rows)
+        if df.empty:
             return []
-            
-        # Convert back to DataFrame for vectorization
-        # This is fast locally
-        df = pd.DataFrame(data['instruments'])
         
         # --- SANITY & SAFETY ---
         # 1. Deduplicate columns to prevent DataFrame-on-Series access errors
@@ -213,12 +250,6 @@ def search_instrument(query, exchange="NSE", segment="CASH"):
         import pandas as pd
         import numpy as np
         
-        # Tokenize
-        tokens = [t for t in query_norm.split() if len(t) > 1]
-        
-        # If no tokens (e.g. query was "."), return empty
-        if not tokens: return []
-        
         # Create Regex Pattern from Tokens (OR Logic)
         escaped_tokens = [re.escape(t) for t in tokens]
         pattern = '|'.join(escaped_tokens)
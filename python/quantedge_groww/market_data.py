@@ -12,21 +12,213 @@ logger = setup_logging()
 
 from .auth import get_groww_client, AuthManager
 from .retry import exponential_backoff
-from .errors import GrowwError, ErrorType
+from .errors import GrowwError, ErrorType, classify_exception
 from .logging_config import setup_logging
 from .resolution_engine import engine as resolution_engine
+from .cache import build_price_cache, NegativeCache
+from .adaptive import AdaptiveBatchController
+from .candle_store import candle_store, candles_to_columns, _subtract_ranges
+from .resample import derive_from_store
+import collections
 import datetime
 import concurrent.futures
+import threading
 import time
+import os
+import base64
+import numpy as np
 
 logger = setup_logging()
 
+
+class _LtpFlight:
+    """One upstream get_ltp call shared by every request that joined it."""
+
+    def __init__(self):
+        self.keys = {}            # ordered set of EXCHANGE_SYMBOL keys
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LtpCoalescer:
+    """
+    Single-flight layer in front of client.get_ltp.
+
+    Concurrent callers asking for overlapping EXCHANGE_SYMBOL keys (e.g. the snapshot,
+    recommendations and events pages refreshing together) are merged: the first caller
+    opens a flight, waits `window_s` for others to join, then issues one upstream call
+    for the union of keys and fans the result out to every waiter. Keys already in an
+    upstream call are not requested again; callers simply wait for that call.
+
+    The window is skipped when the caller is alone on the segment (e.g. one-shot CLI
+    runs), and a caller leading several flights (more than `max_batch` new keys) sends
+    them concurrently after at most one window.
+    """
+
+    def __init__(self, window_s=None, max_batch=None):
+        if window_s is None:
+            window_s = float(os.getenv("GROWW_LTP_COALESCE_WINDOW_MS", 10)) / 1000.0
+        self.window_s = window_s
+        self.max_batch = max_batch or int(os.getenv("GROWW_LTP_MAX_BATCH", 50))
+        self._lock = threading.Lock()
+        self._open = {}       # segment -> _LtpFlight still accepting keys
+        self._in_flight = {}  # (segment, key) -> _LtpFlight already sent upstream
+        self._callers = {}    # segment -> callers currently inside fetch()
+        self.upstream_calls = 0
+        self.coalesced_keys = 0
+
+    def fetch(self, client, segment, symbols):
+        """
+        Returns {key: price} for the requested keys, like client.get_ltp.
+        Raises the upstream exception if a flight containing only our keys fails.
+        """
+        wanted = list(dict.fromkeys(symbols))
+        waits = []
+        leading = []
+
+        with self._lock:
+            self._callers[segment] = self._callers.get(segment, 0) + 1
+            for key in wanted:
+                flight = self._in_flight.get((segment, key))
+                if flight is None:
+                    flight = self._open.get(segment)
+                    if flight is None or (key not in flight.keys and len(flight.keys) >= self.max_batch):
+                        flight = _LtpFlight()
+                        self._open[segment] = flight
+                        leading.append(flight)
+                    if key in flight.keys:
+                        self.coalesced_keys += 1
+                    flight.keys[key] = True
+                else:
+                    self.coalesced_keys += 1
+                if flight not in waits:
+                    waits.append(flight)
+
+        try:
+            if leading:
+                self._launch(client, segment, leading)
+
+            results = {}
+            wanted_set = set(wanted)
+            for flight in waits:
+                flight.done.wait()
+                mine = [k for k in flight.keys if k in wanted_set]
+                if flight.error is not None:
+                    if len(mine) == len(flight.keys):
+                        raise flight.error
+                    # A merged call can fail because of someone else's bad symbol:
+                    # retry just our keys on our own.
+                    results.update(client.get_ltp(segment=segment, exchange_trading_symbols=tuple(mine)) or {})
+                    continue
+                for k in mine:
+                    if k in flight.result:
+                        results[k] = flight.result[k]
+            return results
+        finally:
+            with self._lock:
+                self._callers[segment] -= 1
+                if not self._callers[segment]:
+                    del self._callers[segment]
+
+    def _launch(self, client, segment, flights):
+        """Sends the caller's leading flights: one shared window, then all at once."""
+        with self._lock:
+            # Only worth waiting if someone else could join
+            company = self._callers.get(segment, 0) > 1
+        if company and self.window_s > 0:
+            time.sleep(self.window_s)
+
+        for flight in flights[:-1]:
+            threading.Thread(target=self._send, args=(client, segment, flight), daemon=True).start()
+        self._send(client, segment, flights[-1])
+
+    def _send(self, client, segment, flight):
+        with self._lock:
+            if self._open.get(segment) is flight:
+                del self._open[segment]
+            keys = tuple(flight.keys)
+            for k in keys:
+                self._in_flight[(segment, k)] = flight
+            self.upstream_calls += 1
+
+        try:
+            flight.result = client.get_ltp(segment=segment, exchange_trading_symbols=keys) or {}
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                for k in keys:
+                    if self._in_flight.get((segment, k)) is flight:
+                        del self._in_flight[(segment, k)]
+            flight.done.set()
+
+
+# Process-wide instance shared by get_ltp and get_smart_ltp
+ltp_coalescer = LtpCoalescer()
+
+# Process-wide LRU+TTL cache for LTP / OHLC / quote responses
+price_cache = build_price_cache()
+
+# Symbols rejected as bad (400/404) when requested on their own, skipped until the TTL
+# expires or clear_invalid_symbols removes them
+invalid_symbols = NegativeCache()
+LTP_BISECT_WORKERS = 4
+# Failures that say nothing about which symbol is bad; never bisect on these. Only
+# VALIDATION_ERROR (a bad-request / not-found answer) is split down to single symbols.
+LTP_NON_DATA_ERRORS = (
+    ErrorType.RATE_LIMITED,
+    ErrorType.TIMEOUT,
+    ErrorType.AUTHENTICATION_FAILED,
+    ErrorType.AUTHORIZATION_FAILED,
+    ErrorType.PERMISSION_DENIED,
+    ErrorType.UPSTREAM_UNAVAILABLE,
+    ErrorType.UNKNOWN,
+)
+
+# Process-wide AIMD tuner for get_smart_ltp chunk size and concurrency
+smart_ltp_controller = AdaptiveBatchController.from_env()
+SMART_LTP_MAX_RETRIES = 2
+
+
+def _cache_meta(hit, age_s=0.0):
+    return {"cache": "HIT" if hit else "MISS", "ageMs": round(age_s * 1000, 1)}
+
+
+def _as_of_iso(age_s=0.0):
+    ts = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=age_s)
+    return ts.isoformat()
+
+
+def _split_cached(namespace, segment, symbols):
+    """Returns ({symbol: (value, age_s)} for fresh cache hits, [symbols to fetch])."""
+    hits = {}
+    misses = []
+    for sym in symbols:
+        cached = price_cache.get(namespace, (segment, sym))
+        if cached is None:
+            misses.append(sym)
+        else:
+            hits[sym] = cached
+    return hits, misses
+
+
+def _cache_summary(hits, misses):
+    ages = [age for _, age in hits.values()]
+    return {
+        "cache": {
+            "hits": len(hits),
+            "misses": len(misses),
+            "maxAgeMs": round(max(ages) * 1000, 1) if ages else None,
+        }
+    }
+
 def get_smart_ltp(items):
     """
     Smart LTP Fetching Strategy.
     1. Verifies user account access (NSE/BSE).
-    2. Resolves symbols locally (ISIN -> Symbol -> Name) via ResolutionEngine.
-    3. Batches API calls efficiently (50/batch).
+    2. Resolves symbols locally in one batch (ISIN -> Symbol -> Name -> Fuzzy) via ResolutionEngine.resolve_many.
+    3. Batches API calls with adaptively tuned chunk size and concurrency.
     
     items: List of dicts { 'symbol': ..., 'isin': ..., 'exchange': ... } 
            OR list of strings (treated as symbols).
@@ -50,18 +242,16 @@ def get_smart_ltp(items):
     
     resolved_batch = []
     original_map = {} # normalized_key -> original_item_index
+    resolution_info = {} # original_item_index -> {"tier", "confidence"}
     
-    for idx, item in enumerate(items):
-        query = {}
-        if isinstance(item, str):
-            query = {'symbol': item}
-        elif isinstance(item, dict):
-            query = item
-        else:
-            continue
-            
-        # Resolve
-        match = resolution_engine.resolve(query, enabled_exchanges)
+    # Items may be dicts or plain strings (treated as symbols); anything else is skipped
+    positions = [idx for idx, item in enumerate(items) if isinstance(item, (str, dict))]
+    
+    # Resolve the whole batch in tiered passes (ISIN -> Symbol -> Name -> one fuzzy pass)
+    resolutions = resolution_engine.resolve_many([items[idx] for idx in positions], enabled_exchanges)
+    
+    for idx, res in zip(positions, resolutions):
+        match = res['instrument']
         
         if match:
             # Construct API format string: "EXCHANGE_SYMBOL"
@@ -76,6 +266,7 @@ def get_smart_ltp(items):
             full_symbol = exch_prefix + match.get('trading_symbol', match.get('tradingSymbol'))
             
             resolved_batch.append(full_symbol)
+            resolution_info[idx] = {"tier": res['tier'], "confidence": res['confidence']}
             
             # Map back to let us return data for this input item
             # We key by the full_symbol so when API returns we know who asked for it
@@ -93,44 +284,60 @@ def get_smart_ltp(items):
 
     # 3. Batch Execution
     unique_symbols = list(set(resolved_batch))
-    BATCH_SIZE = 50
-    results = {}
+    cached_hits, unique_symbols = _split_cached("ltp", "CASH", unique_symbols)
 
     client = get_groww_client()
     # Determine segment (default CASH for now, can extract from resolution)
     seg = client.SEGMENT_CASH 
 
     def fetch_chunk(chunk):
+        # Pacing is handled by the LIVE_DATA token bucket on the client
+        started = time.monotonic()
         try:
-            # Rate limit throttle mechanism (simplistic sleep)
-            # Better: use a token bucket. For now, mild sleep.
-            time.sleep(0.2) 
-            
             logger.info(f"SmartBatch: Fetching {len(chunk)}...")
-            resp = client.get_ltp(segment=seg, exchange_trading_symbols=chunk)
-            return resp
+            resp = ltp_coalescer.fetch(client, seg, chunk)
+            return resp, time.monotonic() - started, None
         except Exception as e:
             logger.error(f"SmartBatch failed for chunk: {e}")
-            return {}
+            return {}, time.monotonic() - started, classify_exception(e)
 
-    # Parallel Execution? 
-    # Python threads + GIL? I/O bound is fine.
-    # Max concurrency 3
+    # Sliding window of chunks: chunk size and concurrency are re-read from the
+    # adaptive controller before every submission, so they react mid-refresh.
     final_responses = {}
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        futures = []
-        for i in range(0, len(unique_symbols), BATCH_SIZE):
-            chunk = unique_symbols[i : i + BATCH_SIZE]
-            futures.append(executor.submit(fetch_chunk, chunk))
-            
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                data = future.result()
+    queue = collections.deque(unique_symbols)
+    attempts = {}
+    stats = {"chunks": 0, "retries": 0, "failedChunks": 0}
+    in_flight = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=smart_ltp_controller.max_concurrency) as executor:
+        while queue or in_flight:
+            batch_size, concurrency = smart_ltp_controller.params()
+            while queue and len(in_flight) < concurrency:
+                chunk = [queue.popleft() for _ in range(min(batch_size, len(queue)))]
+                in_flight[executor.submit(fetch_chunk, chunk)] = chunk
+                stats["chunks"] += 1
+
+            done, _ = concurrent.futures.wait(list(in_flight), return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                data, latency, error_type = future.result()
+                smart_ltp_controller.record(latency, error_type)
                 if data:
                     final_responses.update(data)
-            except Exception as exc:
-                logger.error(f"Chunk execution exception: {exc}")
+                if error_type in (ErrorType.RATE_LIMITED, ErrorType.TIMEOUT):
+                    # Capacity problem, not a data problem: requeue (re-chunked at the new size)
+                    retry = [sym for sym in chunk if attempts.get(sym, 0) < SMART_LTP_MAX_RETRIES]
+                    for sym in retry:
+                        attempts[sym] = attempts.get(sym, 0) + 1
+                    queue.extendleft(reversed(retry))
+                    stats["retries"] += 1 if retry else 0
+                elif error_type is not None:
+                    stats["failedChunks"] += 1
+
+    for full_sym, price in final_responses.items():
+        price_cache.put("ltp", ("CASH", full_sym), price)
+    for full_sym, (price, _age) in cached_hits.items():
+        final_responses[full_sym] = price
 
     # 4. Normalize Results
     output_items = []
@@ -163,24 +370,36 @@ def get_smart_ltp(items):
                 # We can construct the response item
                 # The caller expects specific format? 
                 # We'll return a rich object
+                hit = full_sym in cached_hits
+                age = cached_hits[full_sym][1] if hit else 0.0
                 output_items.append({
                     "original_index": original_idx, # Helper
                     "symbol": full_sym, # The resolved symbol we fetched
                     "price": val,
-                    "asOf": now_iso,
-                    "source": "groww_smart"
+                    "asOf": _as_of_iso(age) if hit else now_iso,
+                    "source": "groww_smart",
+                    "resolution": resolution_info.get(original_idx),
+                    "meta": _cache_meta(hit, age)
                 })
     
     # Sort by original index to maintain order? 
     # Or just return list. The UI maps by symbol anyway.
     
-    return {"items": output_items}
+    meta = _cache_summary(cached_hits, unique_symbols)
+    meta["adaptive"] = {**smart_ltp_controller.snapshot(), **stats}
+    meta["resolution"] = {
+        "tiers": dict(collections.Counter(r['tier'] for r in resolutions if r['tier'])),
+        "unresolved": sum(1 for r in resolutions if not r['tier']),
+    }
+    return {"items": output_items, "meta": meta}
 
 @exponential_backoff()
 def get_ltp(exchange_trading_symbols, segment="CASH"):
     """
     Fetches LTP for a list of symbols.
-    Tries batch fetch first, falls back to individual fetch if batch fails (resilient mode).
+    Tries batch fetch first, then bisects failing batches in parallel to isolate invalid
+    symbols (resilient mode). Isolated symbols go to a TTL'd negative cache and are
+    skipped on later calls.
     """
     client = get_groww_client()
     
@@ -200,82 +419,173 @@ def get_ltp(exchange_trading_symbols, segment="CASH"):
     else:
         seg = client.SEGMENT_CASH
 
-    logger.info(f"Fetching LTP for {len(symbols)} symbols")
+    cached_hits, symbols = _split_cached("ltp", segment, symbols)
+
+    # Pre-filter symbols already known to be invalid so they cannot poison the batch
+    known_invalid = [sym for sym in symbols if invalid_symbols.contains(f"{segment}|{sym}")]
+    if known_invalid:
+        skip = set(known_invalid)
+        symbols = [sym for sym in symbols if sym not in skip]
+    symbols = tuple(symbols)
+
+    logger.info(f"Fetching LTP for {len(symbols)} symbols ({len(cached_hits)} cached, {len(known_invalid)} known invalid)")
 
     # Helper to process response dict
     def normalize_response(resp):
         results = []
         now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
         for symbol, price in resp.items():
+            price_cache.put("ltp", (segment, symbol), price)
             results.append({
                 "symbol": symbol,
                 "price": float(price) if price else 0.0,
                 "asOf": now_iso,
                 "source": "groww_live",
-                "curr": "INR"
+                "curr": "INR",
+                "meta": _cache_meta(False)
             })
         return results
 
-    # Recursive Binary Split Strategy
-    # fast O(log N) isolation of invalid symbols
-    def fetch_batch_recursively(batch_symbols):
-        if not batch_symbols:
-            return []
-            
+    def fetch_batch(batch_symbols, coalesce=True):
         try:
-            # Try entire batch
-            resp = client.get_ltp(segment=seg, exchange_trading_symbols=batch_symbols)
-            logger.info(f"Batch success: {len(batch_symbols)} symbols")
-            return normalize_response(resp)
-            
+            if coalesce:
+                return ltp_coalescer.fetch(client, seg, batch_symbols), None
+            return client.get_ltp(segment=seg, exchange_trading_symbols=batch_symbols) or {}, None
         except Exception as e:
-            # If single item batch failed, it's definitely junk
-            if len(batch_symbols) == 1:
-                logger.debug(f"Symbol failed: {batch_symbols[0]} ({str(e)})")
-                return []
-                
-            # Otherwise split and retry
-            mid = len(batch_symbols) // 2
-            logger.info(f"Batch failed ({len(batch_symbols)}), splitting: {mid}/{len(batch_symbols)-mid}")
-            
-            left = fetch_batch_recursively(batch_symbols[:mid])
-            right = fetch_batch_recursively(batch_symbols[mid:])
-            return left + right
+            return None, e
+
+    # Parallel Binary Split Strategy
+    # Every failed batch is halved and all halves of one level are fetched concurrently,
+    # so isolating k bad symbols takes O(log n) rounds instead of O(k log n) serial calls.
+    def fetch_with_bisection(batch_symbols):
+        items = []
+        newly_invalid = []
+        calls = 0
+        level = [tuple(batch_symbols)] if batch_symbols else []
+        depth = 0
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=LTP_BISECT_WORKERS) as executor:
+                while level:
+                    # Only the first attempt is coalesced: merging sibling halves back
+                    # together would just reproduce the failing batch.
+                    outcomes = list(executor.map(fetch_batch, level, [depth == 0] * len(level)))
+                    depth += 1
+                    calls += len(level)
+                    next_level = []
+                    for batch, (resp, err) in zip(level, outcomes):
+                        if err is None:
+                            items.extend(normalize_response(resp))
+                            continue
+
+                        error_type = classify_exception(err)
+                        if error_type in LTP_NON_DATA_ERRORS:
+                            # Capacity/auth/outage problem: splitting would only multiply calls
+                            raise err
+
+                        # A single symbol rejected with a bad-request / not-found answer is junk
+                        if len(batch) == 1:
+                            logger.debug(f"Symbol failed: {batch[0]} ({str(err)})")
+                            newly_invalid.append(batch[0])
+                            continue
+
+                        mid = len(batch) // 2
+                        logger.info(f"Batch failed ({len(batch)}), splitting: {mid}/{len(batch)-mid}")
+                        next_level.extend([batch[:mid], batch[mid:]])
+                    level = next_level
+        finally:
+            # Only definitive single-symbol rejections are remembered, even if a later
+            # level aborted on an outage
+            if newly_invalid:
+                invalid_symbols.add_many(f"{segment}|{sym}" for sym in newly_invalid)
+        return items, newly_invalid, calls
 
     try:
-        # 1. Start Recursive Fetch
-        # This handles everything: successes, partials, and total failures
-        items = fetch_batch_recursively(symbols)
+        # 1. Start Bisecting Fetch
+        # This handles everything: successes, partials, and invalid symbols
+        items, newly_invalid, calls = fetch_with_bisection(symbols)
+
+        for symbol, (price, age) in cached_hits.items():
+            items.append({
+                "symbol": symbol,
+                "price": float(price) if price else 0.0,
+                "asOf": _as_of_iso(age),
+                "source": "groww_live",
+                "curr": "INR",
+                "meta": _cache_meta(True, age)
+            })
         
         # 2. Return Success
         # The frontend expects { "items": [...] }
-        logger.info(f"LTP fetch completed: {len(items)}/{len(symbols)} items retrieved")
-        return {"items": items}
+        logger.info(f"LTP fetch completed: {len(items)}/{len(symbols) + len(cached_hits)} items retrieved")
+        meta = _cache_summary(cached_hits, symbols)
+        meta["upstreamCalls"] = calls
+        meta["invalidSymbols"] = {"skipped": known_invalid, "newlyFlagged": newly_invalid}
+        return {"items": items, "meta": meta}
+
+    except GrowwError:
+        raise
 
     except Exception as e:
-        # Should rarely be reached due to recursion handling exceptions, 
+        error_type = classify_exception(e)
+        if error_type in LTP_NON_DATA_ERRORS:
+            # Surfaced by the bisection instead of being split; rate limits, timeouts
+            # and outages are retryable by the backoff decorator
+            retryable = error_type in (ErrorType.RATE_LIMITED, ErrorType.TIMEOUT, ErrorType.UPSTREAM_UNAVAILABLE)
+            raise GrowwError(error_type, f"LTP failed: {str(e)}", retryable=retryable)
+        # Should rarely be reached since the bisection handles data errors,
         # but safety net for critical client errors
         logger.error(f"Critical LTP error: {str(e)}")
         raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"LTP failed: {str(e)}")
 
 
+def clear_invalid_symbols(exchange_trading_symbols=None, segment="CASH"):
+    """
+    Removes symbols from the invalid-symbol cache so the next get_ltp requests them
+    again. With no symbols, the whole cache is cleared. Returns the number removed.
+    """
+    if not exchange_trading_symbols:
+        return invalid_symbols.clear()
+    if isinstance(exchange_trading_symbols, str):
+        exchange_trading_symbols = [exchange_trading_symbols]
+    return sum(1 for sym in exchange_trading_symbols if invalid_symbols.discard(f"{segment}|{sym}"))
+
+
 @exponential_backoff()
 def get_ohlc(exchange_trading_symbols, segment="CASH"):
     """
     Fetches OHLC for a list of symbols.
+    Symbols priced within the OHLC cache TTL are served from the price cache.
     """
     client = get_groww_client()
     
     try:
-        if isinstance(exchange_trading_symbols, list):
-            symbols = tuple(exchange_trading_symbols) if len(exchange_trading_symbols) > 1 else exchange_trading_symbols[0]
+        if isinstance(exchange_trading_symbols, str):
+            requested = [exchange_trading_symbols]
         else:
-            symbols = exchange_trading_symbols
-        
-        seg = client.SEGMENT_CASH if segment == "CASH" else client.SEGMENT_FNO
-        
-        response = client.get_ohlc(segment=seg, exchange_trading_symbols=symbols)
-        return {"ohlc": response}
+            requested = list(exchange_trading_symbols)
+
+        cached_hits, missing = _split_cached("ohlc", segment, requested)
+
+        response = {}
+        if missing:
+            symbols = tuple(missing) if len(missing) > 1 else missing[0]
+            seg = client.SEGMENT_CASH if segment == "CASH" else client.SEGMENT_FNO
+            response = client.get_ohlc(segment=seg, exchange_trading_symbols=symbols) or {}
+            if isinstance(response, dict):
+                for sym in missing:
+                    if sym in response:
+                        price_cache.put("ohlc", (segment, sym), response[sym])
+
+        if not cached_hits:
+            return {"ohlc": response, "meta": _cache_summary(cached_hits, missing)}
+
+        merged = dict(response) if isinstance(response, dict) else {}
+        for sym, (value, _age) in cached_hits.items():
+            merged[sym] = value
+        meta = _cache_summary(cached_hits, missing)
+        meta["cache"]["symbols"] = {sym: _cache_meta(True, age) for sym, (_v, age) in cached_hits.items()}
+        return {"ohlc": merged, "meta": meta}
         
     except Exception as e:
          if isinstance(e, GrowwError): raise e
@@ -286,7 +596,14 @@ def get_ohlc(exchange_trading_symbols, segment="CASH"):
 def get_quote(trading_symbol, exchange="NSE", segment="CASH"):
     """
     Fetches full quote data for a single instrument.
+    Served from the price cache when a quote is younger than the quote TTL.
     """
+    cache_key = (segment, f"{exchange}_{trading_symbol}")
+    cached = price_cache.get("quote", cache_key)
+    if cached is not None:
+        value, age = cached
+        return {"quote": value, "meta": _cache_meta(True, age)}
+
     client = get_groww_client()
     
     try:
@@ -298,20 +615,43 @@ def get_quote(trading_symbol, exchange="NSE", segment="CASH"):
             segment=seg,
             trading_symbol=trading_symbol
         )
-        return {"quote": response}
+        price_cache.put("quote", cache_key, response)
+        return {"quote": response, "meta": _cache_meta(False)}
         
     except Exception as e:
          if isinstance(e, GrowwError): raise e
          raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"Quote failed: {str(e)}")
 
 
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+SDK_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_epoch(value):
+    """Epoch seconds from an epoch number or a 'YYYY-MM-DD[ HH:MM:SS]' / ISO string (IST if naive)."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    for fmt in (SDK_TIME_FORMAT, "%Y-%m-%d"):
+        try:
+            parsed = datetime.datetime.strptime(text, fmt)
+            break
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        parsed = datetime.datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=IST)
+    return int(parsed.timestamp())
+
+
+def _format_sdk_time(ts):
+    return datetime.datetime.fromtimestamp(ts, IST).strftime(SDK_TIME_FORMAT)
+
+
 @exponential_backoff()
-def get_historical_candles(trading_symbol, start_time, end_time, exchange="NSE", segment="CASH", interval_in_minutes=5):
-    """
-    Fetches historical candle data.
-    """
-    client = get_groww_client()
-    
+def _fetch_candle_rows(client, trading_symbol, start_time, end_time, exchange, segment, interval_in_minutes):
+    """One upstream get_historical_candle_data call; returns the raw [[ts, o, h, l, c, v], ...] rows."""
     try:
         exc = client.EXCHANGE_NSE if exchange == "NSE" else client.EXCHANGE_BSE
         seg = client.SEGMENT_CASH if segment == "CASH" else client.SEGMENT_FNO
@@ -328,18 +668,7 @@ def get_historical_candles(trading_symbol, start_time, end_time, exchange="NSE",
         )
         
         # Response: {"candles": [[timestamp, open, high, low, close, volume], ...]}
-        candles = []
-        for c in response.get("candles", []):
-            candles.append({
-                "timestamp": c[0],
-                "open": c[1],
-                "high": c[2],
-                "low": c[3],
-                "close": c[4],
-                "volume": c[5]
-            })
-        
-        return {"candles": candles, "source": "groww_historical"}
+        return response.get("candles", []) or []
         
     except Exception as e:
          if isinstance(e, GrowwError): raise e
@@ -348,3 +677,118 @@ def get_historical_candles(trading_symbol, start_time, end_time, exchange="NSE",
               raise GrowwError(ErrorType.PERMISSION_DENIED, "Access forbidden for historical data", retryable=False)
               
          raise GrowwError(ErrorType.UPSTREAM_UNAVAILABLE, f"Historical data failed: {str(e)}")
+
+
+def _candle_dicts(columns):
+    candles = []
+    for ts, o, h, l, c, v in zip(columns["ts"].tolist(), columns["open"].tolist(), columns["high"].tolist(),
+                                 columns["low"].tolist(), columns["close"].tolist(), columns["volume"].tolist()):
+        candles.append({
+            "timestamp": ts,
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": None if v != v else v  # NaN -> None
+        })
+    return candles
+
+
+def _candle_columns(columns):
+    """Struct-of-arrays form: int64 timestamps, float64 OHLCV (NaN where upstream sent no value)."""
+    out = {"timestamp": np.ascontiguousarray(columns["ts"], dtype=np.int64)}
+    for name in ("open", "high", "low", "close", "volume"):
+        out[name] = np.ascontiguousarray(columns[name], dtype=np.float64)
+    return out
+
+
+def serialize_candle_columns(columns, encoding="list"):
+    """
+    JSON-safe form of columnar candles.
+    "list": one JSON array per column (NaN -> null).
+    "base64": raw little-endian column bytes, decodable as BigInt64Array / Float64Array.
+    """
+    if encoding == "base64":
+        return {
+            "encoding": "base64",
+            "length": int(len(columns["timestamp"])),
+            "dtypes": {name: arr.dtype.newbyteorder("<").str for name, arr in columns.items()},
+            "columns": {name: base64.b64encode(arr.astype(arr.dtype.newbyteorder("<"), copy=False).tobytes()).decode("ascii")
+                        for name, arr in columns.items()},
+        }
+    out = {}
+    for name, arr in columns.items():
+        values = arr.tolist()
+        if arr.dtype.kind == "f" and np.isnan(arr).any():
+            values = [None if v != v else v for v in values]
+        out[name] = values
+    return {"encoding": "list", "length": len(columns["timestamp"]), "columns": out}
+
+
+def fill_candle_store(trading_symbol, start_ts, end_ts, exchange="NSE", segment="CASH", interval_in_minutes=5):
+    """
+    Fills the parts of [start_ts, end_ts] (epoch seconds) not in the candle store yet:
+    resampled from a finer stored interval where possible, otherwise fetched upstream.
+    Returns {"upstreamRanges": n, "fetchedCandles": n, "derivedRanges": n}.
+    """
+    interval = int(interval_in_minutes or 1)
+    gaps = candle_store.missing(exchange, segment, trading_symbol, interval, start_ts, end_ts)
+    derived = 0
+    if gaps:
+        # Serve what we can by resampling finer stored candles; only the rest goes upstream
+        upstream = []
+        for gap_start, gap_end in gaps:
+            covered = derive_from_store(candle_store, exchange, segment, trading_symbol, interval, gap_start, gap_end)
+            if covered is None:
+                upstream.append((gap_start, gap_end))
+            else:
+                derived += 1
+                upstream.extend(_subtract_ranges(gap_start, gap_end, [covered]))
+        gaps = upstream
+
+    fetched = 0
+    if gaps:
+        client = get_groww_client()
+        for gap_start, gap_end in gaps:
+            requested_at = time.time()
+            rows = _fetch_candle_rows(client, trading_symbol, _format_sdk_time(gap_start), _format_sdk_time(gap_end),
+                                      exchange, segment, interval)
+            settled_end = min(gap_end, int(requested_at) - interval * 60)
+            candle_store.append(exchange, segment, trading_symbol, interval, candles_to_columns(rows),
+                                covered_range=(gap_start, settled_end) if settled_end >= gap_start else None)
+            fetched += len(rows)
+    return {"upstreamRanges": len(gaps), "fetchedCandles": fetched, "derivedRanges": derived}
+
+
+def get_historical_candles(trading_symbol, start_time, end_time, exchange="NSE", segment="CASH",
+                           interval_in_minutes=5, use_store=True, columnar=False):
+    """
+    Fetches historical candle data.
+    Candles are served from the local candle store; ranges not stored yet are resampled
+    from finer stored candles where possible, else requested upstream (and appended). The still-forming last
+    interval is never marked as stored, so it is refreshed on the next call.
+
+    columnar=True returns "candles" as {"timestamp": int64[], "open"...: float64[]} arrays
+    instead of one dict per candle (pd.DataFrame accepts either form).
+    """
+    to_candles = _candle_columns if columnar else _candle_dicts
+    try:
+        start_ts, end_ts = _to_epoch(start_time), _to_epoch(end_time)
+    except (TypeError, ValueError):
+        # Unparseable range: pass it through to the SDK untouched
+        use_store = False
+
+    if not use_store:
+        rows = _fetch_candle_rows(get_groww_client(), trading_symbol, start_time, end_time,
+                                  exchange, segment, interval_in_minutes)
+        return {"candles": to_candles(candles_to_columns(rows)), "source": "groww_historical"}
+
+    interval = int(interval_in_minutes or 1)
+    stored = fill_candle_store(trading_symbol, start_ts, end_ts, exchange, segment, interval)
+
+    columns = candle_store.read(exchange, segment, trading_symbol, interval, start_ts, end_ts)
+    return {
+        "candles": to_candles(columns),
+        "source": "groww_historical",
+        "meta": {"store": stored},
+    }
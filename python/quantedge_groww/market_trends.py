@@ -0,0 +1,182 @@
+"""
+Shared loader for the market_trends/*_10y.json candle files.
+
+The JSON files are parsed once into one columnar cache (under GROWW_CACHE_DIR):
+
+    market_trends_panel/<dir hash>/
+        manifest.json          -> {"version", "sources": {file: [mtime_ns, size, sha1]}, "names", "formatVersion"}
+        v<version>/
+            offsets.npy        row range of each series
+            <column>.npy       timestamp int64, open..volume float64, all series concatenated
+
+Later loads are a few np.load(mmap_mode='r') calls. The cache is rebuilt when a source
+file is added or removed, or its size or content hash changes; a file that was only
+touched (new mtime, same hash) just refreshes the manifest.
+
+As in instrument_store, versions are content-addressed directories published with one
+rename and made current by atomically replacing manifest.json, so several processes can
+build and read the cache at once: a reader always sees a complete version.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from .instrument_store import CACHE_DIR
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+FORMAT_VERSION = 2
+DATA_DIR = "market_trends"
+SUFFIX = "_10y.json"
+CACHE_ROOT = os.path.join(CACHE_DIR, "market_trends_panel")
+COLUMNS = (("timestamp", np.int64), ("open", np.float64), ("high", np.float64),
+           ("low", np.float64), ("close", np.float64), ("volume", np.float64))
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 2
+
+_lock = threading.Lock()
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_dir(data_dir, suffix):
+    key = hashlib.sha1(f"{os.path.abspath(data_dir)}|{suffix}".encode()).hexdigest()[:16]
+    return os.path.join(CACHE_ROOT, key)
+
+
+def _source_files(data_dir, suffix):
+    return sorted(f for f in os.listdir(data_dir) if f.endswith(suffix))
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("formatVersion") != FORMAT_VERSION:
+        return None
+    if not os.path.isdir(os.path.join(cache_dir, f"v{manifest.get('version')}")):
+        return None
+    return manifest
+
+
+def _write_manifest(cache_dir, manifest):
+    # Unique temp name: another process may be writing its own manifest concurrently
+    fd, tmp = tempfile.mkstemp(prefix=MANIFEST_FILE + ".", dir=cache_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST_FILE))
+
+
+def _prune_versions(cache_dir, keep):
+    """Removes all but the newest KEEP_VERSIONS version directories (never `keep`)."""
+    try:
+        dirs = [d for d in os.listdir(cache_dir) if d.startswith("v") and os.path.isdir(os.path.join(cache_dir, d))]
+        dirs.sort(key=lambda d: os.path.getmtime(os.path.join(cache_dir, d)), reverse=True)
+        for d in dirs[KEEP_VERSIONS:]:
+            if d[1:] != keep:
+                shutil.rmtree(os.path.join(cache_dir, d), ignore_errors=True)
+    except OSError as e:
+        logger.warning(f"MarketTrends: failed to prune old cache versions: {e}")
+
+
+def _validate(data_dir, files, manifest):
+    """(still valid, refreshed sources). Hashes are only computed for files whose mtime changed."""
+    if manifest is None or sorted(manifest["sources"]) != files:
+        return False, None
+    sources = {}
+    for name in files:
+        st = os.stat(os.path.join(data_dir, name))
+        mtime_ns, size, digest = manifest["sources"][name]
+        if st.st_size != size:
+            return False, None
+        if st.st_mtime_ns != mtime_ns and _sha1(os.path.join(data_dir, name)) != digest:
+            return False, None
+        sources[name] = [st.st_mtime_ns, st.st_size, digest]
+    return True, sources
+
+
+def _build(data_dir, files, suffix, cache_dir):
+    names, parts, lengths, sources = [], {name: [] for name, _ in COLUMNS}, [], {}
+    for file in files:
+        path = os.path.join(data_dir, file)
+        st = os.stat(path)
+        with open(path, "r") as f:
+            candles = json.load(f)
+        sources[file] = [st.st_mtime_ns, st.st_size, _sha1(path)]
+        ts = np.asarray([c["timestamp"] for c in candles], dtype=np.int64)
+        order = np.argsort(ts, kind="stable")
+        for name, dtype in COLUMNS:
+            values = ts if name == "timestamp" else \
+                np.asarray([c.get(name) for c in candles], dtype=np.float64)   # None -> NaN
+            parts[name].append(values[order].astype(dtype))
+        names.append(file[:-len(suffix)])
+        lengths.append(len(ts))
+
+    digest = hashlib.sha1(json.dumps([FORMAT_VERSION, names, [sources[f][1:] for f in files]]).encode())
+    version = digest.hexdigest()[:16]
+    os.makedirs(cache_dir, exist_ok=True)
+    target = os.path.join(cache_dir, f"v{version}")
+    if not os.path.isdir(target):
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=cache_dir)
+        for name, dtype in COLUMNS:
+            column = np.concatenate(parts[name]) if parts[name] else np.array([], dtype=dtype)
+            np.save(os.path.join(staging, f"{name}.npy"), column)
+        np.save(os.path.join(staging, "offsets.npy"), np.concatenate(([0], np.cumsum(lengths))).astype(np.int64))
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another process published the same version first; its content is identical
+            shutil.rmtree(staging, ignore_errors=True)
+
+    manifest = {"formatVersion": FORMAT_VERSION, "version": version, "names": names, "sources": sources}
+    _write_manifest(cache_dir, manifest)
+    _prune_versions(cache_dir, keep=version)
+    logger.info(f"MarketTrends: cached {len(names)} series ({sum(lengths)} candles) from {data_dir}")
+    return manifest
+
+
+def load_candles(data_dir=DATA_DIR, suffix=SUFFIX):
+    """{name: {"timestamp": int64[], "open".."volume": float64[]}} sorted by timestamp (memory-mapped)."""
+    cache_dir = _cache_dir(data_dir, suffix)
+    with _lock:
+        files = _source_files(data_dir, suffix)
+        manifest = _read_manifest(cache_dir)
+        valid, sources = _validate(data_dir, files, manifest)
+        if not valid:
+            manifest = _build(data_dir, files, suffix, cache_dir)
+        elif sources != manifest["sources"]:
+            manifest["sources"] = sources
+            _write_manifest(cache_dir, manifest)
+
+        version_dir = os.path.join(cache_dir, f"v{manifest['version']}")
+        columns = {name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r") for name, _ in COLUMNS}
+        offsets = np.load(os.path.join(version_dir, "offsets.npy"))
+
+    out = {}
+    for i, name in enumerate(manifest["names"]):
+        lo, hi = int(offsets[i]), int(offsets[i + 1])
+        out[name] = {col: arr[lo:hi] for col, arr in columns.items()}
+    return out
+
+
+def load_frames(data_dir=DATA_DIR, suffix=SUFFIX):
+    """{name: DataFrame} with the candle columns plus 'date' (from the epoch-second timestamp)."""
+    frames = {}
+    for name, candles in load_candles(data_dir, suffix).items():
+        df = pd.DataFrame({col: np.asarray(arr) for col, arr in candles.items()})
+        df['date'] = pd.to_datetime(df['timestamp'], unit='s')
+        frames[name] = df
+    return frames
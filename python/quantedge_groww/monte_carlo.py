@@ -0,0 +1,172 @@
+"""
+Monte Carlo P&L distribution for a holdings vector.
+
+Horizon log returns are drawn as mu * h + sqrt(h) * L z, with L the Cholesky factor of
+the daily covariance from quantedge_groww.covariance (stored candle history) and z
+standard normal. Paths are generated in chunks sized to a fixed memory budget
+(GROWW_MC_CHUNK_MB), so 500 instruments x 50k paths never materialises one huge matrix.
+Each chunk gets its own seed spawned from one SeedSequence, so results are identical
+whether chunks run in-process or on a process pool. Pool workers are capped at the CPU
+count and started with "spawn", never forked from the threaded serve process.
+"""
+import os
+import time
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from .candle_store import candle_store
+from .covariance import estimate, parse_universe
+from .errors import GrowwError, ErrorType
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+CHUNK_BYTES = int(float(os.getenv("GROWW_MC_CHUNK_MB", 64)) * 1024 * 1024)
+MAX_PATHS = int(os.getenv("GROWW_MC_MAX_PATHS", 200000))
+CONFIDENCE_LEVELS = (0.95, 0.99)
+PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+
+def cholesky_factor(cov):
+    """Lower Cholesky factor; adds a growing diagonal jitter if cov is not positive definite."""
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    for _ in range(8):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 10
+    raise GrowwError(ErrorType.VALIDATION_ERROR, "Covariance matrix is not positive definite")
+
+
+def chunk_paths(n_instruments, budget_bytes=CHUNK_BYTES):
+    """Paths per chunk so the normal draws and returns (2 float64 matrices) fit the budget."""
+    return max(1, int(budget_bytes // (2 * 8 * max(n_instruments, 1))))
+
+
+def _simulate_chunk(seed, paths, drift, factor, values):
+    """P&L of `paths` scenarios: values . expm1(drift + z L')."""
+    rng = np.random.default_rng(seed)
+    draws = rng.standard_normal((paths, len(values)))
+    returns = draws @ factor.T
+    returns += drift
+    np.expm1(returns, out=returns)
+    return returns @ values
+
+
+def simulate(drift, factor, values, paths, seed=None, workers=1, budget_bytes=CHUNK_BYTES):
+    """P&L for `paths` scenarios (float64 array), generated chunk by chunk."""
+    per_chunk = chunk_paths(len(values), budget_bytes)
+    sizes = [per_chunk] * (paths // per_chunk) + ([paths % per_chunk] if paths % per_chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(int(workers or 1), os.cpu_count() or 1, len(sizes))
+
+    if workers > 1:
+        # Forking while other threads hold locks (logging, rate limiter) can deadlock the child
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                    mp_context=multiprocessing.get_context("spawn")) as executor:
+            parts = list(executor.map(_simulate_chunk, seeds, sizes, [drift] * len(sizes),
+                                      [factor] * len(sizes), [values] * len(sizes)))
+    else:
+        parts = [_simulate_chunk(s, n, drift, factor, values) for s, n in zip(seeds, sizes)]
+    return np.concatenate(parts) if parts else np.array([], dtype=np.float64)
+
+
+def risk_summary(pnl, total_value, levels=CONFIDENCE_LEVELS):
+    """VaR / CVaR (as positive losses) at each confidence level, plus the P&L distribution."""
+    ordered = np.sort(pnl)
+    out = {"var": {}, "cvar": {}}
+    for level in levels:
+        k = max(1, int(np.floor((1 - level) * len(ordered))))
+        var = -ordered[k - 1]
+        cvar = -ordered[:k].mean()
+        label = f"{level:g}"
+        out["var"][label] = {"value": round(float(var), 2), "pct": round(float(var / total_value * 100), 4)}
+        out["cvar"][label] = {"value": round(float(cvar), 2), "pct": round(float(cvar / total_value * 100), 4)}
+    out["mean"] = round(float(pnl.mean()), 2)
+    out["std"] = round(float(pnl.std(ddof=1)), 2) if len(pnl) > 1 else 0.0
+    out["percentiles"] = {str(p): round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(pnl, PERCENTILES))}
+    counts, edges = np.histogram(pnl, bins=50)
+    out["histogram"] = {"counts": counts.tolist(), "edges": np.round(edges, 2).tolist()}
+    return out
+
+
+def _holding_values(holdings, universe, store):
+    """
+    Rupee exposure per holding: "value", else quantity x ("price" or last stored close).
+    None for a holding that cannot be valued.
+    """
+    values = []
+    for item, (exchange, segment, symbol) in zip(holdings, universe):
+        item = item if isinstance(item, dict) else {}
+        if item.get("value") is not None:
+            values.append(float(item["value"]))
+            continue
+        price = item.get("price")
+        if price is None:
+            closes = store.read(exchange, segment, symbol, 1440)["close"]
+            price = float(closes[-1]) if len(closes) else None
+        if price is None or item.get("quantity") is None:
+            values.append(None)
+            continue
+        values.append(float(item["quantity"]) * float(price))
+    return values
+
+
+def run_monte_carlo(holdings, paths=20000, horizon_days=1, window=252, as_of=None, method="ewma",
+                    shrinkage="auto", seed=None, workers=1, levels=CONFIDENCE_LEVELS, store=None):
+    """
+    holdings: [{"symbol": "NSE_RELIANCE" | "RELIANCE", "exchange", "segment",
+                "value" | "quantity" (+ optional "price")}, ...]
+    Holdings without a full covariance window are reported as unmodelled and left out;
+    so are holdings that cannot be valued (no value, or no price and no stored close),
+    listed with a null value.
+    """
+    paths = int(paths)
+    if not 0 < paths <= MAX_PATHS:
+        raise GrowwError(ErrorType.VALIDATION_ERROR, f"paths must be between 1 and {MAX_PATHS}")
+    if not holdings:
+        raise GrowwError(ErrorType.VALIDATION_ERROR, "No holdings")
+    store = store or candle_store
+    started = time.monotonic()
+
+    universe = parse_universe(holdings)
+    values_by_key, priced, unvalued = {}, [], []
+    for instrument, value in zip(universe, _holding_values(holdings, universe, store)):
+        key = f"{instrument[0]}_{instrument[2]}"
+        if value is None:
+            unvalued.append(key)
+            continue
+        priced.append(instrument)
+        values_by_key[key] = values_by_key.get(key, 0.0) + value
+    if not priced:
+        raise GrowwError(ErrorType.VALIDATION_ERROR,
+                         "No holding could be valued: give a value, or a quantity with a price or stored history")
+
+    est = estimate([dict(exchange=e, segment=seg, symbol=s) for e, seg, s in dict.fromkeys(priced)],
+                   window=window, as_of=as_of, method=method, shrinkage=shrinkage, store=store)
+    unmodelled = {k: round(v, 2) for k, v in values_by_key.items() if k in est["excluded"]}
+    unmodelled.update({k: None for k in unvalued if k not in values_by_key})
+    values = np.array([values_by_key[k] for k in est["symbols"]], dtype=np.float64)
+    modelled = float(values.sum())
+    if modelled == 0:
+        raise GrowwError(ErrorType.VALIDATION_ERROR, "Modelled portfolio value is zero")
+
+    h = float(horizon_days)
+    factor = cholesky_factor(est["covariance"] * h)
+    drift = est["mean"] * h
+    pnl = simulate(drift, factor, values, paths, seed=seed, workers=workers)
+
+    result = risk_summary(pnl, modelled, levels)
+    result.update({
+        "paths": paths,
+        "horizonDays": horizon_days,
+        "asOf": est["asOf"],
+        "method": est["method"],
+        "observations": est["observations"],
+        "shrinkage": est["shrinkage"],
+        "modelledValue": round(modelled, 2),
+        "unmodelled": unmodelled,
+        "elapsedMs": round((time.monotonic() - started) * 1000, 1),
+    })
+    return result
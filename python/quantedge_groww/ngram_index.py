@@ -0,0 +1,159 @@
+"""
+Trigram inverted index over instrument name and trading_symbol.
+
+Fuzzy search used to run regex str.contains over every row of the master, once for
+the candidate mask and again per token for scoring. With this index a query token
+of length >= 3 maps to the intersection of its trigrams' posting lists (a superset
+of the rows containing it), and a 2-char token to the union of postings of trigrams
+containing it. Callers then verify and score only those candidate rows.
+
+Stored per master version under v<version>/ngram_index/ as CSR arrays:
+    grams    sorted uint64 trigram codes
+    offsets  posting list i is rows[offsets[i]:offsets[i + 1]]
+    rows     master row positions (int32, sorted within each list)
+"""
+import threading
+import numpy as np
+from . import instrument_store
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+INDEX_DIR = "ngram_index"
+FIELDS = ("name", "trading_symbol")
+_BITS = 21  # Enough for any unicode code point
+
+
+def _gram_code(a, b, c):
+    return (a << (2 * _BITS)) | (b << _BITS) | c
+
+
+def _field_grams(values):
+    """(codes, rows) for every trigram of ' ' + upper(value) + ' ' (vectorized)."""
+    text = np.char.upper(np.asarray(values).astype(str))
+    padded = np.char.add(np.char.add(' ', text), ' ')
+    width = padded.dtype.itemsize // 4
+    if len(padded) == 0 or width < 3:
+        return np.array([], dtype=np.uint64), np.array([], dtype=np.int32)
+
+    points = np.ascontiguousarray(padded).view(np.uint32).reshape(len(padded), width).astype(np.uint64)
+    row_ids = np.arange(len(padded), dtype=np.int32)
+    codes, rows = [], []
+    for j in range(width - 2):
+        last = points[:, j + 2]
+        valid = last != 0  # Past the end of shorter strings
+        if not valid.any():
+            break
+        codes.append(_gram_code(points[valid, j], points[valid, j + 1], last[valid]))
+        rows.append(row_ids[valid])
+    return np.concatenate(codes), np.concatenate(rows)
+
+
+def build_arrays(master):
+    parts = [_field_grams(master.column(f)) for f in FIELDS if master.has_column(f)]
+    codes = np.concatenate([p[0] for p in parts]) if parts else np.array([], dtype=np.uint64)
+    rows = np.concatenate([p[1] for p in parts]) if parts else np.array([], dtype=np.int32)
+
+    order = np.lexsort((rows, codes))
+    codes, rows = codes[order], rows[order]
+    if len(codes):
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+    grams, starts = np.unique(codes, return_index=True)
+    offsets = np.append(starts, len(codes)).astype(np.int64)
+    return {"grams": grams, "offsets": offsets, "rows": rows.astype(np.int32)}
+
+
+class NgramIndex:
+    """Candidate generator for substring queries over name / trading_symbol."""
+
+    def __init__(self, grams, offsets, rows):
+        self.grams = grams
+        self.offsets = offsets
+        self.rows = rows
+
+    def _posting(self, code):
+        i = int(np.searchsorted(self.grams, code))
+        if i < len(self.grams) and self.grams[i] == code:
+            return self.rows[self.offsets[i]:self.offsets[i + 1]]
+        return None
+
+    def _gather(self, gram_positions):
+        """Union of the posting lists at the given gram positions."""
+        if not len(gram_positions):
+            return np.array([], dtype=np.int32)
+        starts = self.offsets[gram_positions]
+        lengths = self.offsets[gram_positions + 1] - starts
+        total = int(lengths.sum())
+        # Flat positions of every posting entry, without a Python loop per list
+        base = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.unique(self.rows[base + np.arange(total)])
+
+    def token_candidates(self, token):
+        """Sorted rows whose name or symbol may contain `token` (upper-case)."""
+        points = [ord(ch) for ch in token]
+        if len(points) >= 3:
+            codes = {_gram_code(*points[i:i + 3]) for i in range(len(points) - 2)}
+            postings = []
+            for code in codes:
+                posting = self._posting(code)
+                if posting is None:
+                    return np.array([], dtype=np.int32)
+                postings.append(posting)
+            postings.sort(key=len)
+            result = np.asarray(postings[0])
+            for posting in postings[1:]:
+                result = np.intersect1d(result, posting, assume_unique=True)
+                if not len(result):
+                    break
+            return result
+        if len(points) == 2:
+            pair = (points[0] << _BITS) | points[1]
+            grams = self.grams
+            hit = ((grams >> np.uint64(_BITS)) == pair) | ((grams & np.uint64((1 << 2 * _BITS) - 1)) == pair)
+            return self._gather(np.flatnonzero(hit))
+        return np.array([], dtype=np.int32)
+
+    def candidates(self, tokens):
+        """Rows matching any token (OR semantics, like the old regex alternation)."""
+        found = [self.token_candidates(t) for t in tokens]
+        found = [f for f in found if len(f)]
+        if not found:
+            return np.array([], dtype=np.int32)
+        if len(found) == 1:
+            return np.asarray(found[0])
+        return np.unique(np.concatenate(found))
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(master):
+    """NgramIndex for a master version: memory-mapped if stored, else built and saved once."""
+    with _lock:
+        index = _indexes.get(master.version)
+        if index is not None:
+            return index
+
+        arrays = None
+        try:
+            arrays = instrument_store.load_derived(master, INDEX_DIR, ("grams", "offsets", "rows"))
+        except Exception as e:
+            logger.warning(f"NgramIndex: stored index unreadable ({e}); rebuilding")
+        if arrays is None:
+            logger.info(f"NgramIndex: building trigram index for master {master.version}")
+            arrays = build_arrays(master)
+            try:
+                instrument_store.save_derived(master, INDEX_DIR, arrays)
+            except Exception as e:
+                logger.warning(f"NgramIndex: could not persist index ({e})")
+
+        index = NgramIndex(arrays["grams"], arrays["offsets"], arrays["rows"])
+        # Keep only the current and previous version around
+        while len(_indexes) >= 2:
+            _indexes.pop(next(iter(_indexes)))
+        _indexes[master.version] = index
+        return index
@@ -0,0 +1,83 @@
+"""
+Date x series panels of closing prices and whole-panel summary statistics.
+
+Every series is one column of a single aligned matrix (NaN where a series has no
+candle on a date), and each statistic is one vectorized operation over all columns,
+so summarising hundreds of series (e.g. every holding) costs about as much as one.
+"""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def close_panel(series):
+    """
+    {name: candles} -> DataFrame of closes indexed by date (UTC, from epoch seconds),
+    one column per name. candles may be a list of candle dicts, a columnar dict
+    ({"timestamp": [...], "close": [...]}) or a DataFrame with those columns.
+    Repeated timestamps (overlapping fetch chunks) keep the last candle.
+    """
+    columns = {}
+    for name, data in series.items():
+        if isinstance(data, list):
+            # Candle dicts: pull the two fields directly instead of building a full DataFrame
+            timestamps = [c["timestamp"] for c in data]
+            close = [c["close"] for c in data]
+        else:
+            timestamps, close = data["timestamp"], data["close"]
+        if not len(timestamps):
+            continue
+        closes = pd.Series(np.asarray(close, dtype=np.float64),
+                           index=pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit="s"))
+        columns[name] = closes[~closes.index.duplicated(keep="last")]
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis=1).sort_index()
+
+
+def summarize_panel(panel):
+    """
+    Per-column start/end price, total return, CAGR, max drawdown and annualized
+    volatility, each measured over that column's own first..last candle.
+    Returns a DataFrame indexed by series name; columns with fewer than 2 candles
+    or a zero-day span are dropped.
+    """
+    values = panel.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    keep = counts >= 2
+    if not keep.any():
+        return pd.DataFrame()
+    n = len(values)
+    first = valid.argmax(axis=0)
+    last = n - 1 - valid[::-1].argmax(axis=0)
+    cols = np.arange(values.shape[1])
+
+    start_price = values[first, cols]
+    end_price = values[last, cols]
+    dates = panel.index
+    days = (dates[last] - dates[first]).days.to_numpy()
+    keep &= days != 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_return = (end_price - start_price) / start_price * 100
+        years = days / 365.25
+        cagr = ((end_price / start_price) ** (1 / years) - 1) * 100
+
+    drawdown = (panel - panel.cummax()) / panel.cummax()
+    # Returns between each series' own consecutive candles (gaps in the panel are skipped)
+    returns = panel.ffill().pct_change(fill_method=None).where(panel.notna())
+    volatility = returns.std() * (TRADING_DAYS ** 0.5) * 100
+
+    summary = pd.DataFrame({
+        "first_date": dates[first],
+        "last_date": dates[last],
+        "start_price": start_price,
+        "end_price": end_price,
+        "total_return_pct": total_return,
+        "cagr_pct": cagr,
+        "max_drawdown_pct": drawdown.min().to_numpy() * 100,
+        "volatility_annualized_pct": volatility.to_numpy(),
+    }, index=panel.columns)
+    return summary[keep]
@@ -0,0 +1,164 @@
+"""
+Token-bucket rate limiting for Groww SDK calls.
+Mirrors the buckets in lib/groww/GrowwRateLimiter.ts so the Python layer paces
+itself instead of relying on fixed sleeps.
+"""
+import os
+import threading
+import time
+from .errors import ErrorType, classify_exception
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+# bucket -> (max_tokens, refill_rate tokens/sec). Same values as the Node limiter.
+BUCKETS = {
+    "LIVE_DATA": (50, 10.0),    # High throughput for portfolio batching
+    "ORDERS": (2, 0.5),         # Low throughput, critical
+    "NON_TRADING": (5, 2.0),    # Metadata sync
+}
+
+# SDK method -> bucket. Anything not listed is NON_TRADING.
+METHOD_BUCKETS = {
+    "get_ltp": "LIVE_DATA",
+    "get_ohlc": "LIVE_DATA",
+    "get_quote": "LIVE_DATA",
+    "get_historical_candle_data": "LIVE_DATA",
+    "get_historical_candles": "LIVE_DATA",
+    "get_option_chain": "LIVE_DATA",
+    "get_greeks": "LIVE_DATA",
+    "place_order": "ORDERS",
+    "modify_order": "ORDERS",
+    "cancel_order": "ORDERS",
+    "create_smart_order": "ORDERS",
+    "modify_smart_order": "ORDERS",
+    "cancel_smart_order": "ORDERS",
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available,
+    sleeping exactly as long as the refill needs rather than polling.
+    """
+
+    def __init__(self, max_tokens, refill_rate, clock=time.monotonic):
+        self.max_tokens = float(max_tokens)
+        self.refill_rate = float(refill_rate)
+        self._clock = clock
+        self._tokens = float(max_tokens)
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.max_tokens, self._tokens + elapsed * self.refill_rate)
+            self._last = now
+
+    def acquire(self, tokens=1.0):
+        """Takes `tokens`, blocking as needed. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.waited_s += waited
+                    return waited
+                deficit = tokens - self._tokens
+                delay = deficit / self.refill_rate
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens=1.0):
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def drain(self):
+        """Empties the bucket, e.g. after upstream reported a rate limit."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = 0.0
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+
+class RateLimiter:
+    """Holds one TokenBucket per bucket type. Limits can be overridden with
+    GROWW_RATE_LIMIT_<BUCKET>="max_tokens:refill_per_sec"."""
+
+    def __init__(self, buckets=None):
+        config = dict(buckets or BUCKETS)
+        for name in list(config):
+            override = os.getenv(f"GROWW_RATE_LIMIT_{name}")
+            if override:
+                try:
+                    max_tokens, rate = override.split(":")
+                    config[name] = (float(max_tokens), float(rate))
+                except ValueError:
+                    logger.warning(f"Ignoring invalid GROWW_RATE_LIMIT_{name}={override}")
+        self.buckets = {name: TokenBucket(*cfg) for name, cfg in config.items()}
+
+    def acquire(self, bucket):
+        return self.buckets[bucket].acquire()
+
+    def bucket_for(self, method_name):
+        return METHOD_BUCKETS.get(method_name, "NON_TRADING")
+
+
+class RateLimitedClient:
+    """
+    Transparent proxy around a GrowwAPI instance: every SDK method call takes a
+    token from its bucket first. Constants (SEGMENT_CASH, EXCHANGE_NSE, ...) pass through,
+    and attribute writes (e.g. clearing the SDK's cached `instruments`) go to the client.
+    """
+
+    _own_attrs = ("_client", "_limiter")
+
+    def __init__(self, client, limiter=None):
+        self._client = client
+        self._limiter = limiter or rate_limiter
+
+    def __setattr__(self, name, value):
+        if name in self._own_attrs:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._client, name, value)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        bucket = self._limiter.bucket_for(name)
+        limiter = self._limiter
+
+        def call(*args, **kwargs):
+            waited = limiter.acquire(bucket)
+            if waited > 0.05:
+                logger.debug(f"RateLimiter: {name} waited {waited:.2f}s for {bucket}")
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                if classify_exception(e) == ErrorType.RATE_LIMITED:
+                    logger.warning(f"RateLimiter: upstream rate limit on {name}, draining {bucket}")
+                    limiter.buckets[bucket].drain()
+                raise
+
+        call.__name__ = name
+        return call
+
+
+# Process-wide limiter shared by every client instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,121 @@
+"""
+Derives coarser candles (5m, 15m, 60m, daily) from finer ones in the candle store.
+
+Bars follow Groww's alignment: intraday buckets start at the 09:15 IST session open
+(09:15, 09:30, ... for 15m; 09:15, 10:15, ... for 60m), daily bars at IST midnight.
+Aggregation is one vectorized pass over the sorted source rows (reduceat per bucket).
+Nothing coarser than a day is derived: weekly/monthly bars always come from upstream.
+
+Derived bars are appended to the store under their own interval with the range marked
+covered, so they are computed once; later reads of that interval are plain store reads.
+"""
+import numpy as np
+from .candle_store import COLUMNS
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+IST_OFFSET_S = 19800
+DAY_S = 86400
+DAY_MINUTES = 1440
+SESSION_OPEN_S = 9 * 3600 + 15 * 60
+SESSION_CLOSE_S = 15 * 3600 + 30 * 60
+
+
+def _day_starts(ts):
+    return (ts + IST_OFFSET_S) // DAY_S * DAY_S - IST_OFFSET_S
+
+
+def bucket_starts(ts, interval_minutes):
+    """Start (epoch s) of the `interval_minutes` bar each timestamp falls in."""
+    if interval_minutes > DAY_MINUTES:
+        raise ValueError(f"Cannot bucket {interval_minutes}m bars: intervals above one day are not derived")
+    ts = np.asarray(ts, dtype=np.int64)
+    day = _day_starts(ts)
+    if interval_minutes == DAY_MINUTES:
+        return day
+    width = int(interval_minutes) * 60
+    return day + SESSION_OPEN_S + (ts - day - SESSION_OPEN_S) // width * width
+
+
+def _bucket_end(bucket_start, interval_minutes):
+    width = DAY_S if interval_minutes == DAY_MINUTES else int(interval_minutes) * 60
+    return int(bucket_start) + width - 1
+
+
+def resample_columns(columns, interval_minutes):
+    """
+    OHLCV bars at `interval_minutes` from sorted {column: array} candles:
+    first open, max high, min low, last close, summed volume per bucket.
+    """
+    ts = np.asarray(columns["ts"], dtype=np.int64)
+    if not len(ts):
+        return {name: np.array([], dtype=dtype) for name, dtype in COLUMNS}
+    buckets = bucket_starts(ts, interval_minutes)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return {
+        "ts": buckets[starts],
+        "open": np.asarray(columns["open"], dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(columns["high"], dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(columns["low"], dtype=np.float64), starts),
+        "close": np.asarray(columns["close"], dtype=np.float64)[ends],
+        "volume": np.add.reduceat(np.asarray(columns["volume"], dtype=np.float64), starts),
+    }
+
+
+def _in_session(start_ts, end_ts):
+    """True if [start_ts, end_ts] overlaps market hours on any day."""
+    day = int(_day_starts(np.int64(start_ts)))
+    while day <= end_ts:
+        if max(start_ts, day + SESSION_OPEN_S) <= min(end_ts, day + SESSION_CLOSE_S - 1):
+            return True
+        day += DAY_S
+    return False
+
+
+def derive_from_store(store, exchange, segment, symbol, interval_minutes, start_ts, end_ts):
+    """
+    Fills [start_ts, end_ts] of `interval_minutes` from the finest stored interval that
+    divides it and fully covers the range. Returns the (start, end) range now covered,
+    or None if no stored source can serve it.
+
+    A bar straddling the range edge is only kept if the source also covers (or has no
+    trading time in) the part outside the range; otherwise the range shrinks by that bar.
+    Intervals above one day (weekly, monthly) are never derived.
+    """
+    if not 0 < interval_minutes <= DAY_MINUTES:
+        return None
+    for source in store.intervals(exchange, segment, symbol):
+        # Target bars must be whole multiples of the source bars
+        if source >= interval_minutes or interval_minutes % source:
+            continue
+        if store.missing(exchange, segment, symbol, source, start_ts, end_ts):
+            continue
+
+        first = int(bucket_starts([start_ts], interval_minutes)[0])
+        last = int(bucket_starts([end_ts], interval_minutes)[0])
+        last_end = _bucket_end(last, interval_minutes)
+
+        def edge_complete(lo, hi):
+            return lo > hi or not store.missing(exchange, segment, symbol, source, lo, hi) \
+                or not _in_session(lo, hi)
+
+        bars = resample_columns(store.read(exchange, segment, symbol, source, first, last_end), interval_minutes)
+        covered_start, covered_end = start_ts, end_ts
+        keep = np.ones(len(bars["ts"]), dtype=bool)
+        if not edge_complete(first, start_ts - 1):
+            keep &= bars["ts"] != first
+            covered_start = _bucket_end(first, interval_minutes) + 1
+        if not edge_complete(end_ts + 1, last_end):
+            keep &= bars["ts"] != last
+            covered_end = last - 1
+        if covered_start > covered_end:
+            return None
+
+        bars = {name: arr[keep] for name, arr in bars.items()}
+        store.append(exchange, segment, symbol, interval_minutes, bars, covered_range=(covered_start, covered_end))
+        logger.info(f"Resample: {exchange}/{segment}/{symbol} {source}m -> {interval_minutes}m, "
+                    f"{len(bars['ts'])} bars")
+        return covered_start, covered_end
+    return None
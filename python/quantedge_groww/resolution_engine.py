@@ -3,88 +3,217 @@ Resolution Engine
 Resolves raw user inputs to valid Groww instruments using local cache.
 Prioritizes NSE over BSE when available on both.
 """
+import numpy as np
 import pandas as pd
-from .instruments import get_all_instruments, search_instrument
+from .instruments import get_instrument_master, search_instrument
 from .logging_config import setup_logging
+from .cache import build_memo_cache
+from . import instrument_store
+from . import resolution_index
+from .resolution_index import ExchangeIndex
+from . import ngram_index
+from . import approximate_index
 import re
+import threading
 
 logger = setup_logging()
 
+# Confidence reported per strict tier; fuzzy matches scale up to FUZZY_MAX_CONFIDENCE
+TIER_CONFIDENCE = {'isin': 1.0, 'symbol': 0.95, 'name': 0.85}
+APPROXIMATE_MAX_CONFIDENCE = 0.8
+FUZZY_MAX_CONFIDENCE = 0.75
+
 class ResolutionEngine:
     def __init__(self):
         self.isin_index = {}      # ISIN -> {'NSE': instr, 'BSE': instr}
         self.symbol_index = {}    # Symbol -> {'NSE': instr, 'BSE': instr}
         self.name_index = {}      # NormName -> {'NSE': instr, 'BSE': instr}
-        self.df = None            # Cached DataFrame for fuzzy search
+        self.master_version = None
+        self._master = None       # Master the persisted index was built for
+        self._latest = None       # Newest master (differs after incremental changes)
+        self._arrays = {}         # Memory-mapped resolution index arrays
+        self._stale_keys = set()  # Instrument keys of _master rows changed/removed since
+        self._extra = None        # Search frame of rows added/changed since _master
+        self._approximate = None  # {'symbol'|'name': DeletionIndex}, loaded on first use
+        self._name_cache = build_memo_cache("GROWW_NAME_CACHE_MAX_ENTRIES", 50000)
+        self._resolve_cache = build_memo_cache("GROWW_RESOLVE_CACHE_MAX_ENTRIES", 20000)
+        self._lock = threading.RLock()
         self._initialized = False
 
     def initialize(self):
         """
-        Builds in-memory indices from the full instrument list.
+        Loads the persisted resolution index for the current instrument master
+        (building it once per master version if needed).
+        Once loaded, re-checks the instrument master and applies any incremental
+        changes (see refresh()).
+        """
+        with self._lock:
+            if self._initialized:
+                self._refresh_locked()
+                return
+
+            logger.info("ResolutionEngine: initializing indices...")
+            master = get_instrument_master() # Columnar, memory-mapped
+            self._build(master)
+
+    def refresh(self):
+        """
+        Brings the indices up to date with the current instrument master.
+        A changelog entry for our version -> current version is applied in place
+        (cost proportional to churn); otherwise the index for the new version is loaded.
         """
-        if self._initialized:
+        with self._lock:
+            if not self._initialized:
+                self._build(get_instrument_master())
+            else:
+                self._refresh_locked()
+
+    def _refresh_locked(self):
+        master = get_instrument_master()
+        if master.version == self.master_version:
             return
 
-        logger.info("ResolutionEngine: initializing indices...")
-        data = get_all_instruments() # Cached call
-        instruments = data.get('instruments', [])
-        
-        count = 0
-        for instr in instruments:
-            # Skip non-equity for now if needed, or keep all
-            segment = instr.get('segment')
-            if segment != 'CASH': 
-                continue
-
-            exchange = instr.get('exchange')
-            isin = instr.get('isin')
-            symbol = instr.get('trading_symbol')
-            name = instr.get('name')
-            
-            # 1. Index by ISIN
-            if isin:
-                if isin not in self.isin_index: self.isin_index[isin] = {}
-                self.isin_index[isin][exchange] = instr
-            
-            # 2. Index by Symbol
-            if symbol:
-                if symbol not in self.symbol_index: self.symbol_index[symbol] = {}
-                self.symbol_index[symbol][exchange] = instr
-                
-            if name:
-                norm = self._normalize_string(name)
-                # Store strict collisions? For now last-write-wins per exchange, 
-                # but usually names are unique per company.
-                if norm not in self.name_index: self.name_index[norm] = {}
-                self.name_index[norm][exchange] = instr
-
-            count += 1
-            
-        # 4. Prepare DataFrame for Search
-        # We filter duplicates logic or just use all instruments
-        # We need a clean DataFrame with string columns for searching
-        if instruments:
-            logger.info("ResolutionEngine: Building search vectors...")
-            self.df = pd.DataFrame(instruments)
-            # Pre-compute upper case columns for speed
-            self.df['search_name'] = self.df['name'].fillna('').astype(str).str.upper()
-            self.df['search_symbol'] = self.df['trading_symbol'].fillna('').astype(str).str.upper()
-            
+        change = instrument_store.read_change(self.master_version, master.version)
+        if change is None or change.get("fullRebuild"):
+            logger.info(f"ResolutionEngine: master {self.master_version} -> {master.version}, rebuilding")
+            self._build(master)
+            return
+
+        self._apply_change(master, change)
+
+    def _build(self, master):
+        arrays = resolution_index.load_or_build(master)
+        self._arrays = arrays
+        self._master = master
+        self._latest = master
+        self._stale_keys = set()
+        self._extra = None
+        self._approximate = None
+        self.master_version = master.version
+        self._resolve_cache.clear()
+
+        self.isin_index = ExchangeIndex(master, arrays['isin_keys'], arrays['isin_rows'], self._record)
+        self.symbol_index = ExchangeIndex(master, arrays['symbol_keys'], arrays['symbol_rows'], self._record)
+        self.name_index = ExchangeIndex(master, arrays['name_keys'], arrays['name_rows'], self._record)
+
         self._initialized = True
-        logger.info(f"ResolutionEngine: Indexed {count} equity instruments.")
+        logger.info(f"ResolutionEngine: Loaded index for {len(arrays['symbol_keys'])} equity instruments.")
+
+    @staticmethod
+    def _record(master, row):
+        return master.record(row)
+
+    def _candidate_arrays(self, rows):
+        """
+        Search columns for trigram-index rows of _master, minus rows changed or removed
+        since, plus rows added since. Returns (rows, search_names, search_symbols);
+        positions past len(rows) refer to self._extra.
+        """
+        if self._stale_keys and len(rows):
+            keys = instrument_store.instrument_keys(self._master)[rows]
+            rows = rows[~np.isin(keys, list(self._stale_keys))]
+        if 'search_name' in self._arrays:
+            names = np.asarray(self._arrays['search_name'][rows])
+            symbols = np.asarray(self._arrays['search_symbol'][rows])
+        else:
+            frame = self._search_frame(self._master, rows)
+            names = frame['search_name'].to_numpy(dtype=str)
+            symbols = frame['search_symbol'].to_numpy(dtype=str)
+        if self._extra is not None and len(self._extra):
+            names = np.concatenate([names, self._extra['search_name'].to_numpy(dtype=str)])
+            symbols = np.concatenate([symbols, self._extra['search_symbol'].to_numpy(dtype=str)])
+        return rows, names, symbols
+
+    def _candidate_record(self, rows, i):
+        if i < len(rows):
+            return self._search_frame(self._master, rows[i:i + 1]).iloc[0].to_dict()
+        return self._extra.iloc[i - len(rows)].to_dict()
+
+    def _search_frame(self, master, rows=None):
+        df = master.to_frame(rows=rows)
+        keys = instrument_store.instrument_keys(master)
+        df['_key'] = keys[rows] if rows is not None else keys
+        if master is self._master and 'search_name' in self._arrays:
+            # Upper-cased columns were precomputed with the index
+            idx = rows if rows is not None else slice(None)
+            df['search_name'] = np.asarray(self._arrays['search_name'][idx])
+            df['search_symbol'] = np.asarray(self._arrays['search_symbol'][idx])
+        else:
+            df['search_name'] = df['name'].fillna('').astype(str).str.upper()
+            df['search_symbol'] = df['trading_symbol'].fillna('').astype(str).str.upper()
+        return df
+
+    def _index_entries(self, instr):
+        return (
+            (self.isin_index, instr.get('isin')),
+            (self.symbol_index, instr.get('trading_symbol')),
+            (self.name_index, self._normalize_string(instr.get('name'))),
+        )
+
+    def _apply_change(self, master, change):
+        """Patches indices and the search frame with one changelog entry."""
+        stale = set(change.get("removed", [])) | set(change.get("changed", []))
+        fresh = set(change.get("added", [])) | set(change.get("changed", []))
+        previous = self._latest
+
+        # Only the churned rows are touched; the mapped index stays as it is
+        if stale:
+            old_keys = instrument_store.instrument_keys(previous)
+            old_rows = np.flatnonzero(np.isin(old_keys, list(stale)) &
+                                      (np.asarray(previous.column('segment')) == 'CASH'))
+            for row in old_rows.tolist():
+                instr = previous.record(row)
+                for index, value in self._index_entries(instr):
+                    index.exclude(value, instr.get('exchange'), instr)
+
+        keys = instrument_store.instrument_keys(master)
+        rows = np.flatnonzero(np.isin(keys, list(fresh))) if fresh else np.array([], dtype=int)
+        for row in rows.tolist():
+            instr = master.record(row)
+            if instr.get('segment') == 'CASH':
+                for index, value in self._index_entries(instr):
+                    index.include(value, instr.get('exchange'), instr)
+
+        # The trigram index stays on _master: mask stale rows and carry new ones aside
+        self._stale_keys |= stale
+        extra = self._extra
+        if extra is not None:
+            extra = extra[~extra['_key'].isin(stale)]
+        if len(rows):
+            extra = pd.concat([extra, self._search_frame(master, rows)], ignore_index=True) \
+                if extra is not None else self._search_frame(master, rows)
+        self._extra = extra
+
+        self._latest = master
+        self.master_version = master.version
+        self._resolve_cache.clear()
+        logger.info(f"ResolutionEngine: applied instrument changes {change.get('counts')} -> {master.version}")
 
     def _normalize_string(self, s):
         if not s: return ""
         if not isinstance(s, str): return ""
+        cached = self._name_cache.get("memo", s)
+        if cached is not None:
+            return cached[0]
+        raw = s
         # Remove special chars, spaces, common suffixes
+        # (keep in sync with resolution_index.normalize_names)
         s = s.upper()
         s = re.sub(r'[^A-Z0-9]', '', s) # Compact: "Adani Wilmar Ltd" -> "ADANIWILMARLTD"
         # Standardize suffixes
-        for suffix in ['LIMITED', 'LTD', 'PVT', 'PRIVATE', 'INDIA', 'IND']:
+        for suffix in resolution_index.NAME_SUFFIXES:
             if s.endswith(suffix):
                 s = s[:-len(suffix)]
+        self._name_cache.put("memo", raw, s)
         return s
 
+    def cache_stats(self):
+        """Hit rates of the name-normalization and resolve() memo caches."""
+        return {
+            "normalize": self._name_cache.stats(),
+            "resolve": self._resolve_cache.stats(),
+        }
+
     def resolve(self, query, enabled_exchanges=None):
         """
         Resolves a single query object to a target instrument.
@@ -93,132 +222,236 @@ class ResolutionEngine:
         
         Returns: { 'exchange': 'NSE', 'symbol': 'RELIANCE', ... } or None
         """
+        return self.resolve_many([query], enabled_exchanges)[0]['instrument']
+
+    def resolve_many(self, queries, enabled_exchanges=None):
+        """
+        Resolves a whole upload in tiered passes, each one batch lookup over the
+        rows still unresolved:
+          1. ISIN join (highest confidence)
+          2. Symbol join
+          3. Normalized-name join
+          4. Approximate match on symbol / normalized name (bounded edit distance)
+          5. One batched fuzzy pass over name + symbol
+        Queries are dicts as for resolve(); plain strings are treated as symbols.
+        Results are memoized (bounded LRU) until the instrument master version changes.
+
+        Returns one {'instrument': instr or None, 'tier': 'isin' | 'symbol' | 'name' | 'approximate' | 'fuzzy' | None,
+        'confidence': 0..1} per query, in order.
+        """
         if not self._initialized:
             self.initialize()
-            
-        # 1. ISIN Lookup (Highest Confidence)
-        if query.get('isin'):
-            match = self._pick_best(self.isin_index.get(query['isin']), query.get('exchange'), enabled_exchanges)
-            if match: return match
-            
-        # 2. Symbol Lookup
+
+        queries = [q if isinstance(q, dict) else {'symbol': q} if isinstance(q, str) else {} for q in queries]
+        results = [None] * len(queries)
+
+        # Memoized per master version: repeated rows across uploads skip every tier
+        version = self.master_version
+        keys = [(version,) + self._memo_key(q, enabled_exchanges) for q in queries]
+        misses = {}
+        for i, key in enumerate(keys):
+            cached = self._resolve_cache.get("memo", key)
+            if cached is not None:
+                results[i] = dict(cached[0])
+            else:
+                misses.setdefault(key, []).append(i)
+
+        if misses:
+            first = [positions[0] for positions in misses.values()]
+            resolved = self._resolve_tiers([queries[i] for i in first], enabled_exchanges)
+            for key, res in zip(misses, resolved):
+                self._resolve_cache.put("memo", key, res)
+                for i in misses[key]:
+                    results[i] = dict(res)
+        return results
+
+    @staticmethod
+    def _memo_key(query, enabled_exchanges):
+        fields = tuple(None if query.get(k) is None else str(query.get(k))
+                       for k in ('isin', 'symbol', 'name', 'exchange'))
+        return fields + (tuple(sorted(enabled_exchanges)) if enabled_exchanges else None,)
+
+    def _resolve_tiers(self, queries, enabled_exchanges):
+        results = [{'instrument': None, 'tier': None, 'confidence': 0.0} for _ in queries]
+        pending = list(range(len(queries)))
+
+        passes = (
+            ('isin', self.isin_index, lambda q: str(q['isin']) if q.get('isin') else ''),
+            ('symbol', self.symbol_index, lambda q: str(q['symbol']).strip() if q.get('symbol') else ''),
+            ('name', self.name_index, lambda q: self._normalize_string(q.get('name'))),
+        )
+        for tier, index, key_of in passes:
+            found = index.get_many([key_of(queries[i]) for i in pending])
+            unresolved = []
+            for i, exchange_map in zip(pending, found):
+                match = self._pick_best(exchange_map, queries[i].get('exchange'), enabled_exchanges)
+                if match:
+                    results[i] = {'instrument': match, 'tier': tier, 'confidence': TIER_CONFIDENCE[tier]}
+                else:
+                    unresolved.append(i)
+            pending = unresolved
+            if not pending:
+                return results
+
+        # Approximate: symbol / normalized name within a small edit distance (typos, abbreviations)
+        unresolved = []
+        for i in pending:
+            match, score = self._approximate_match(queries[i], enabled_exchanges)
+            if match:
+                results[i] = {'instrument': match, 'tier': 'approximate',
+                              'confidence': round(APPROXIMATE_MAX_CONFIDENCE * score, 3)}
+            else:
+                unresolved.append(i)
+        pending = unresolved
+        if not pending:
+            return results
+
+        # Fuzzy/Search Fallback: strict lookups failed.
+        # Combine Name + Symbol for maximum context
+        if self._master is None:
+            return results
+        q_strs = [" ".join(str(queries[i][k]) for k in ('name', 'symbol') if queries[i].get(k)) for i in pending]
+        for i, q_str, match in zip(pending, q_strs, self._fuzzy_many(q_strs)):
+            if match:
+                logger.debug(f"ResolutionEngine: Fuzzy match found for '{q_str}': {match.get('trading_symbol')}")
+                tokens = [t for t in q_str.upper().split() if len(t) > 1]
+                confidence = FUZZY_MAX_CONFIDENCE * min(1.0, max(match['score'], 0.0) / len(tokens))
+                results[i] = {'instrument': match, 'tier': 'fuzzy', 'confidence': round(confidence, 3)}
+        return results
+
+    def _approximate_indexes(self):
+        if self._approximate is None:
+            with self._lock:
+                if self._approximate is None:
+                    self._approximate = approximate_index.load_or_build(self._master, {
+                        'symbol': self._arrays['symbol_keys'],
+                        'name': self._arrays['name_keys'],
+                    })
+        return self._approximate
+
+    def approximate_matches(self, text, kind='symbol', limit=10):
+        """
+        Edit-distance bounded matches for a trading symbol (kind='symbol') or a company
+        name (kind='name', normalized first), best first:
+        [{'key', 'distance', 'score'}], score = 1 - distance / longer length.
+        """
+        if not self._initialized:
+            self.initialize()
+        if kind == 'name':
+            text, index = self._normalize_string(text), self.name_index
+        else:
+            text, index = re.sub(r'[^A-Z0-9]', '', str(text or '').upper()), self.symbol_index
+        ranked = self._approximate_indexes()[kind].lookup(text, limit=limit, extra_keys=index.added_keys())
+        return [{'key': key, 'distance': d, 'score': score} for key, d, score in ranked]
+
+    def _approximate_match(self, query, enabled_exchanges=None):
+        """Best (instrument, score) from the approximate stage, or (None, 0.0)."""
+        options = []
         if query.get('symbol'):
-            s = query['symbol'].strip()
-            # Try raw
-            match = self._pick_best(self.symbol_index.get(s), query.get('exchange'), enabled_exchanges)
-            if match: return match
-            
-            # Try removing special chars if failed?
-            # Maybe later.
-            
-        # 3. Name Lookup (Lowest Confidence)
+            for m in self.approximate_matches(query['symbol'], 'symbol'):
+                options.append((m['distance'], -m['score'], 0, m['key'], self.symbol_index))
         if query.get('name'):
-            norm = self._normalize_string(query['name'])
-            match = self._pick_best(self.name_index.get(norm), query.get('exchange'), enabled_exchanges)
-            if match: return match
-            
-        # 3b. Fuzzy/Search Fallback
-        # If we are here, strict name lookup failed.
-        # Combine Name + Symbol for maximum context
-        parts = []
-        if query.get('name'): parts.append(query['name'])
-        if query.get('symbol'): parts.append(query['symbol'])
-        
-        q_str = " ".join(parts)
-        if q_str and self.df is not None:
-             match = self._fuzzy_search_local(q_str, query.get('exchange') or 'NSE')
-             if match:
-                 logger.debug(f"ResolutionEngine: Fuzzy match found for '{q_str}': {match.get('trading_symbol')}")
-                 return match
-                 
-        return None
+            for m in self.approximate_matches(query['name'], 'name'):
+                options.append((m['distance'], -m['score'], 1, m['key'], self.name_index))
+        # Fewest edits first; on ties prefer the symbol match
+        for _, neg_score, _, key, index in sorted(options, key=lambda o: o[:4]):
+            match = self._pick_best(index.get(key), query.get('exchange'), enabled_exchanges)
+            if match:
+                return match, -neg_score
+        return None, 0.0
 
     def _fuzzy_search_local(self, query, exchange_pref="NSE"):
         """
-        Fast in-memory fuzzy search using cached DataFrame.
+        Fast in-memory fuzzy search: trigram candidates, then scoring on those rows.
         """
-        if not query: return None
-        
-        try:
+        return self._fuzzy_many([query])[0]
+
+    def _fuzzy_many(self, queries):
+        """
+        Batched fuzzy search. Trigram candidates for every distinct token are gathered
+        once and checked once; each query is then scored on its own candidate rows.
+        Returns the best record (with 'score') or None per query.
+        """
+        results = [None] * len(queries)
+        prepared = []
+        for i, query in enumerate(queries):
             # 1. Clean Query
-            clean_q = query.upper().strip()
-            
+            clean_q = (query or '').upper().strip()
             # 2. Tokenize
             tokens = [t for t in clean_q.split() if len(t) > 1]
-            if not tokens: return None
-            
-            # 3. Vectorized Search
-            # Uses pre-computed 'search_name' and 'search_symbol'
-            
-            # Create Mask
-            escaped_tokens = [re.escape(t) for t in tokens]
-            pattern = '|'.join(escaped_tokens)
-            
-            # Simple contains check on Name OR Symbol
-            mask = self.df['search_name'].str.contains(pattern, regex=True, na=False) | \
-                   self.df['search_symbol'].str.contains(pattern, regex=True, na=False)
-                   
-            if not mask.any():
-                return None
+            if tokens:
+                prepared.append((i, clean_q, tokens))
+        if not prepared:
+            return results
+        
+        try:
+            # 3. Candidates from the trigram index; only these rows are checked and scored
+            index = ngram_index.get_index(self._master)
+            token_rows = {t: index.token_candidates(t) for t in {t for _, _, tokens in prepared for t in tokens}}
+            union = np.unique(np.concatenate(list(token_rows.values()))).astype(np.int64)
+            rows, names, symbols = self._candidate_arrays(union)
+            if not len(names):
+                return results
+            name_len = np.char.str_len(names)
+            sym_len = np.char.str_len(symbols)
+            extra = np.arange(len(rows), len(names))
+
+            # Token presence over the candidates, once per distinct token
+            presence = {}
+            for token, cand in token_rows.items():
+                pos = np.searchsorted(rows, cand)
+                ok = pos < len(rows)
+                ok[ok] = rows[pos[ok]] == cand[ok]
+                pos = np.concatenate([pos[ok], extra])
+                hit = np.zeros(len(names), dtype=bool)
+                hit[pos] = (np.char.find(names[pos], token) >= 0) | (np.char.find(symbols[pos], token) >= 0)
+                presence[token] = hit
+
+            for i, clean_q, tokens in prepared:
+                # 4. Score: full token presence bonus; a row must contain at least one token
+                count = np.sum([presence[t] for t in tokens], axis=0)
+                pos = np.flatnonzero(count)
+                if not len(pos):
+                    logger.debug(f"Fuzzy local: No candidates found for {clean_q}")
+                    continue
+                score = count[pos].astype(float)
+                cand_names, cand_symbols = names[pos], symbols[pos]
                 
-            candidates = self.df[mask].copy()
-            
-            # 4. Score
-            candidates['score'] = 0.0
-            
-            # Full token presence bonus
-            for token in tokens:
-                t_esc = re.escape(token)
-                has_token = candidates['search_name'].str.contains(t_esc, regex=True) | \
-                            candidates['search_symbol'].str.contains(t_esc, regex=True)
-                candidates.loc[has_token, 'score'] += 1.0
+                # Exact/Startswith Bonus
+                score += 5.0 * (cand_symbols == clean_q)
+                score += 3.0 * (cand_names == clean_q)
+                score += 2.0 * np.char.startswith(cand_names, clean_q)
                 
-            # Exact/Startswith Bonus
-            candidates.loc[candidates['search_symbol'] == clean_q, 'score'] += 5.0
-            candidates.loc[candidates['search_name'] == clean_q, 'score'] += 3.0
-            candidates.loc[candidates['search_name'].str.startswith(clean_q), 'score'] += 2.0
-            
-            # Penalize Length Difference based on the closest match (Symbol OR Name)
-            # We want to favor "AKSHARCHEM" (symbol len 10) for "ARCHEM" (len 6) 
-            # over the full name "AKSHARCHEM INDIA LTD" (len 18)
-            diff_name = (candidates['search_name'].str.len() - len(clean_q)).abs()
-            diff_sym = (candidates['search_symbol'].str.len() - len(clean_q)).abs()
-            
-            # Element-wise min
-            import numpy as np
-            min_diff = np.minimum(diff_name, diff_sym)
-            
-            candidates.loc[:, 'score'] -= (min_diff * 0.05)
-            
-            # Sort
-            candidates = candidates.sort_values(by='score', ascending=False)
-            
-            if candidates.empty:
-                logger.debug(f"Fuzzy local: No candidates found for {clean_q}")
-                return None
+                # Penalize Length Difference based on the closest match (Symbol OR Name)
+                # We want to favor "AKSHARCHEM" (symbol len 10) for "ARCHEM" (len 6) 
+                # over the full name "AKSHARCHEM INDIA LTD" (len 18)
+                diff_name = np.abs(name_len[pos] - len(clean_q))
+                diff_sym = np.abs(sym_len[pos] - len(clean_q))
+                score -= np.minimum(diff_name, diff_sym) * 0.05
                 
-            # Log top 3 for debugging
-            top_3 = candidates.head(3)[['search_symbol', 'score']].to_dict(orient='records')
-            logger.debug(f"Fuzzy local top 3 for {clean_q}: {top_3}")
-
-            # Pick best
-            # Prefer preferred exchange if scores are close? 
-            # For now just take top.
-            top_rec = candidates.iloc[0].to_dict()
-            
-            # Low score cutoff?
-            if top_rec['score'] < 0.5: # Arbitrary
-                 logger.debug(f"Fuzzy local: Top match {top_rec.get('search_symbol')} score {top_rec['score']} < 0.5")
-                 return None
-                 
-            # Remap keys to match internal dict format
-            # Our DF comes from get_all_instruments list of dicts
-            # Keys should match
-            return top_rec
+                # Log top 3 for debugging
+                order = np.argsort(-score, kind='stable')
+                top_3 = [{'search_symbol': str(cand_symbols[j]), 'score': float(score[j])} for j in order[:3]]
+                logger.debug(f"Fuzzy local top 3 for {clean_q}: {top_3}")
+
+                # Pick best
+                # Prefer preferred exchange if scores are close? 
+                # For now just take top.
+                best = int(order[0])
+                
+                # Low score cutoff?
+                if score[best] < 0.5: # Arbitrary
+                     logger.debug(f"Fuzzy local: Top match {cand_symbols[best]} score {score[best]} < 0.5")
+                     continue
+                     
+                # Keys match the instrument master's snake_case columns
+                top_rec = self._candidate_record(rows, int(pos[best]))
+                top_rec['score'] = float(score[best])
+                results[i] = top_rec
             
         except Exception as e:
             logger.error(f"Fuzzy search error: {e}")
-            return None
+        return results
 
     def _pick_best(self, exchange_map, preferred_exchange=None, enabled_exchanges=None):
         """
@@ -0,0 +1,162 @@
+"""
+Persistent resolution index.
+
+For each instrument-master version, the ISIN / trading-symbol / normalized-name lookups
+used by ResolutionEngine are built once with vectorized NumPy/pandas operations and saved
+next to the master columns:
+
+    v<version>/resolution_index/<kind>_keys.npy   sorted lookup keys
+    v<version>/resolution_index/<kind>_rows.npy   master row for each key
+    v<version>/resolution_index/search_<col>.npy  upper-cased search columns
+
+Later processes memory-map these files; a lookup is a binary search (np.searchsorted),
+so cold resolution never loops over the universe in Python.
+"""
+import numpy as np
+import pandas as pd
+from . import instrument_store
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+INDEX_DIR = "resolution_index"
+INDEX_KINDS = ("isin", "symbol", "name")
+NAME_SUFFIXES = ['LIMITED', 'LTD', 'PVT', 'PRIVATE', 'INDIA', 'IND']
+
+
+def normalize_names(values):
+    """
+    Vectorized twin of ResolutionEngine._normalize_string:
+    upper-case, drop non-alphanumerics, strip common suffixes (in order, once each).
+    """
+    s = pd.Series(values, dtype=object).fillna('').astype(str).str.upper()
+    s = s.str.replace(r'[^A-Z0-9]', '', regex=True)
+    for suffix in NAME_SUFFIXES:
+        ends = s.str.endswith(suffix)
+        if ends.any():
+            s = s.where(~ends, s.str[:-len(suffix)])
+    return s.to_numpy(dtype=str)
+
+
+class ExchangeIndex:
+    """
+    Read-only dict-like view: key -> {exchange: instrument dict}, backed by sorted,
+    memory-mapped key/row arrays. Incremental master changes are layered on top as
+    an in-memory overlay (see include/exclude), leaving the mapped files untouched.
+    """
+
+    def __init__(self, master, keys, rows, record):
+        self.master = master
+        self.keys = keys
+        self.rows = rows
+        self._record = record
+        self._overlay = {}
+
+    def get(self, key, default=None):
+        return self.get_many([key])[0] or default
+
+    def get_many(self, keys):
+        """
+        Batch lookup (one vectorized searchsorted for all keys).
+        Returns a list aligned with `keys` of {exchange: instr} or None.
+        """
+        out = [None] * len(keys)
+        pending = {}
+        for i, key in enumerate(keys):
+            if not key:
+                continue
+            if key in self._overlay:
+                out[i] = self._overlay[key] or None
+            else:
+                pending.setdefault(key, []).append(i)
+        if not pending or not len(self.keys):
+            return out
+
+        wanted = np.asarray(list(pending), dtype=str)
+        lo = np.searchsorted(self.keys, wanted, side='left')
+        hi = np.searchsorted(self.keys, wanted, side='right')
+        exchanges = self.master.column('exchange')
+        for key, a, b in zip(pending, lo.tolist(), hi.tolist()):
+            if a == b:
+                continue
+            mapping = {}
+            # Rows are in master order within a key: later rows win, as before
+            for row in self.rows[a:b]:
+                mapping[str(exchanges[row])] = self._record(self.master, int(row))
+            for i in pending[key]:
+                out[i] = mapping
+        return out
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.keys) + len(self._overlay)
+
+    def added_keys(self):
+        """Keys introduced by incremental changes (not in the mapped arrays' key set)."""
+        return [k for k, mapping in self._overlay.items() if mapping]
+
+    def include(self, key, exchange, instr):
+        if not key:
+            return
+        mapping = dict(self.get(key) or {})
+        mapping[exchange] = instr
+        self._overlay[key] = mapping
+
+    def exclude(self, key, exchange, instr):
+        if not key:
+            return
+        mapping = dict(self.get(key) or {})
+        if mapping.get(exchange) == instr:
+            del mapping[exchange]
+        self._overlay[key] = mapping
+
+
+def _build_arrays(master):
+    cash_rows = np.flatnonzero(np.asarray(master.column('segment')) == 'CASH')
+    sources = {
+        "isin": np.asarray(master.column('isin'))[cash_rows] if master.has_column('isin') else None,
+        "symbol": np.asarray(master.column('trading_symbol'))[cash_rows],
+        "name": normalize_names(np.asarray(master.column('name'))[cash_rows]),
+    }
+
+    arrays = {}
+    for kind, keys in sources.items():
+        if keys is None:
+            keys = np.array([], dtype=str)
+            rows = np.array([], dtype=np.int64)
+        else:
+            present = keys != ''
+            keys = keys[present]
+            rows = cash_rows[present]
+            order = np.argsort(keys, kind='stable')
+            keys, rows = keys[order], rows[order].astype(np.int64)
+        arrays[f"{kind}_keys"] = np.asarray(keys, dtype=str)
+        arrays[f"{kind}_rows"] = rows
+
+    arrays["search_name"] = np.char.upper(np.asarray(master.column('name')).astype(str))
+    arrays["search_symbol"] = np.char.upper(np.asarray(master.column('trading_symbol')).astype(str))
+    return arrays
+
+
+def load_or_build(master):
+    """
+    Returns {name: array} for the master's resolution index, memory-mapped from
+    disk when present, otherwise built (vectorized) and persisted first.
+    """
+    names = [f"{k}_{part}" for k in INDEX_KINDS for part in ("keys", "rows")] + ["search_name", "search_symbol"]
+    try:
+        arrays = instrument_store.load_derived(master, INDEX_DIR, names)
+        if arrays is not None:
+            return arrays
+    except Exception as e:
+        logger.warning(f"ResolutionIndex: stored index unreadable ({e}); rebuilding")
+
+    logger.info(f"ResolutionIndex: building index for master {master.version}")
+    arrays = _build_arrays(master)
+    try:
+        instrument_store.save_derived(master, INDEX_DIR, arrays)
+    except Exception as e:
+        logger.warning(f"ResolutionIndex: could not persist index ({e})")
+    return arrays
@@ -0,0 +1,223 @@
+"""
+Rolling risk metrics over stored daily candles, updated incrementally.
+
+For each window (30/90/252 bars by default) the state keeps:
+  - the last N daily returns with their running sum and sum of squares (volatility),
+  - the last N (benchmark, series) return pairs with running co-moments (beta),
+  - a monotonic deque of closes for the rolling peak (drawdown from the N-bar high).
+
+Each new bar is O(1). The state is persisted as JSON next to the candle store, so a
+daily refresh reads only the bars after the last processed one. Only settled candles
+(inside the store's covered range for both the series and the benchmark) are consumed.
+"""
+import os
+import json
+import math
+import threading
+from collections import deque
+from .candle_store import STORE_DIR, candle_store
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+WINDOWS = (30, 90, 252)
+BENCHMARK = ("NSE", "CASH", "NIFTY")   # NIFTY 50
+TRADING_DAYS = 252
+STATE_DIR = os.path.join(STORE_DIR, "rolling")
+
+
+class _Window:
+    """Running state for one window length."""
+
+    def __init__(self, size):
+        self.size = size
+        self.returns = deque()
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.pairs = deque()
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+        self.peaks = deque()   # (bar index, close), closes strictly decreasing
+        self.updates = 0
+
+    def add_return(self, r):
+        self.returns.append(r)
+        self.sum += r
+        self.sumsq += r * r
+        if len(self.returns) > self.size:
+            old = self.returns.popleft()
+            self.sum -= old
+            self.sumsq -= old * old
+        self.updates += 1
+        if self.updates % self.size == 0:
+            # Re-sum once per full rotation so add/subtract rounding cannot accumulate
+            self.sum = math.fsum(self.returns)
+            self.sumsq = math.fsum(r * r for r in self.returns)
+
+    def add_pair(self, x, y):
+        self.pairs.append((x, y))
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+        if len(self.pairs) > self.size:
+            ox, oy = self.pairs.popleft()
+            self.sx -= ox
+            self.sy -= oy
+            self.sxx -= ox * ox
+            self.sxy -= ox * oy
+        if self.updates % self.size == 0:
+            self.sx = math.fsum(p[0] for p in self.pairs)
+            self.sy = math.fsum(p[1] for p in self.pairs)
+            self.sxx = math.fsum(p[0] * p[0] for p in self.pairs)
+            self.sxy = math.fsum(p[0] * p[1] for p in self.pairs)
+
+    def add_close(self, index, close):
+        while self.peaks and self.peaks[-1][1] <= close:
+            self.peaks.pop()
+        self.peaks.append((index, close))
+        while self.peaks[0][0] <= index - self.size:
+            self.peaks.popleft()
+
+    def metrics(self, last_close):
+        n = len(self.returns)
+        volatility = None
+        if n == self.size and n > 1:
+            var = (self.sumsq - self.sum * self.sum / n) / (n - 1)
+            volatility = round(math.sqrt(max(var, 0.0)) * math.sqrt(TRADING_DAYS) * 100, 4)
+
+        beta = None
+        m = len(self.pairs)
+        if m == self.size and m > 1:
+            var_x = self.sxx - self.sx * self.sx / m
+            if var_x > 0:
+                beta = round((self.sxy - self.sx * self.sy / m) / var_x, 4)
+
+        drawdown = None
+        if self.peaks and last_close is not None:
+            peak = self.peaks[0][1]
+            drawdown = round((last_close - peak) / peak * 100, 4)
+        return {"volatilityPct": volatility, "beta": beta, "drawdownPct": drawdown}
+
+    def to_dict(self):
+        return {"size": self.size, "returns": list(self.returns), "pairs": [list(p) for p in self.pairs],
+                "peaks": [list(p) for p in self.peaks], "updates": self.updates}
+
+    @classmethod
+    def from_dict(cls, data):
+        w = cls(data["size"])
+        for r in data["returns"]:
+            w.returns.append(r)
+        for x, y in data["pairs"]:
+            w.pairs.append((x, y))
+        w.peaks = deque((int(i), c) for i, c in data["peaks"])
+        w.updates = data["updates"]
+        w.sum = math.fsum(w.returns)
+        w.sumsq = math.fsum(r * r for r in w.returns)
+        w.sx = math.fsum(p[0] for p in w.pairs)
+        w.sy = math.fsum(p[1] for p in w.pairs)
+        w.sxx = math.fsum(p[0] * p[0] for p in w.pairs)
+        w.sxy = math.fsum(p[0] * p[1] for p in w.pairs)
+        return w
+
+
+class RollingMetrics:
+    """
+    Rolling volatility, beta (vs `benchmark`) and drawdown for one symbol's daily candles.
+
+        RollingMetrics("RELIANCE").refresh()
+        -> {"asOf": ts, "bars": n, "windows": {"30": {"volatilityPct", "beta", "drawdownPct"}, ...}}
+    """
+
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, symbol, exchange="NSE", segment="CASH", benchmark=BENCHMARK, windows=WINDOWS,
+                 store=None, state_dir=STATE_DIR):
+        self.series = (exchange, segment, symbol)
+        self.benchmark = tuple(benchmark)
+        self.windows = tuple(int(w) for w in windows)
+        self.store = store or candle_store
+        name = "__".join("_".join(part) for part in (self.series, self.benchmark)).replace(os.sep, "_")
+        self.path = os.path.join(state_dir, f"{name}.json")
+        with RollingMetrics._locks_guard:
+            self._lock = RollingMetrics._locks.setdefault(self.path, threading.Lock())
+
+    def _new_state(self):
+        return {
+            "windows": self.windows, "lastTs": None, "bars": 0,
+            "lastClose": None, "lastPair": None,   # lastPair: (benchmark close, series close)
+            "state": {str(w): _Window(w) for w in self.windows},
+        }
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return self._new_state()
+        if tuple(raw.get("windows", ())) != self.windows:
+            return self._new_state()
+        raw["state"] = {k: _Window.from_dict(v) for k, v in raw["state"].items()}
+        return raw
+
+    def _save(self, state):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        out = dict(state, windows=list(self.windows), state={k: w.to_dict() for k, w in state["state"].items()})
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(out, f)
+        os.replace(tmp, self.path)
+
+    def _settled_until(self):
+        """Last timestamp covered for both series (forming candles are never consumed)."""
+        ends = []
+        for exchange, segment, symbol in (self.series, self.benchmark):
+            coverage = self.store.coverage(exchange, segment, symbol, 1440)
+            if not coverage:
+                return None
+            ends.append(coverage[-1][1])
+        return min(ends)
+
+    def refresh(self):
+        """Consumes daily candles stored since the last refresh and returns the current metrics."""
+        with self._lock:
+            state = self._load()
+            horizon = self._settled_until()
+            start = None if state["lastTs"] is None else state["lastTs"] + 1
+            if horizon is not None and (start is None or start <= horizon):
+                bars = self.store.read(*self.series, 1440, start, horizon)
+                bench = self.store.read(*self.benchmark, 1440, start, horizon)
+                bench_close = dict(zip(bench["ts"].tolist(), bench["close"].tolist()))
+                windows = state["state"].values()
+
+                for ts, close in zip(bars["ts"].tolist(), bars["close"].tolist()):
+                    if close != close:
+                        continue
+                    if state["lastClose"]:
+                        r = close / state["lastClose"] - 1
+                        for w in windows:
+                            w.add_return(r)
+                    b = bench_close.get(ts)
+                    if b is not None and b == b:
+                        if state["lastPair"] and state["lastPair"][0] and state["lastPair"][1]:
+                            x = b / state["lastPair"][0] - 1
+                            y = close / state["lastPair"][1] - 1
+                            for w in windows:
+                                w.add_pair(x, y)
+                        state["lastPair"] = [b, close]
+                    for w in windows:
+                        w.add_close(state["bars"], close)
+                    state["bars"] += 1
+                    state["lastClose"] = close
+                    state["lastTs"] = ts
+                if len(bars["ts"]):
+                    logger.info(f"RollingMetrics: {'/'.join(self.series)} consumed {len(bars['ts'])} bars")
+                state["lastTs"] = horizon
+                self._save(state)
+
+            return {
+                "asOf": state["lastTs"],
+                "bars": state["bars"],
+                "benchmark": "/".join(self.benchmark),
+                "windows": {k: w.metrics(state["lastClose"]) for k, w in state["state"].items()},
+            }